@@ -0,0 +1,315 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import synthcorpus
+from segment import jieba_version
+from tables import TABLE_BACKENDS
+
+# 整条流水线的基准测试
+#
+# 对 xxx/ 语料和若干大小的合成语料（见 synthcorpus），依次计时各阶段：
+#   segment  分词并统计原始词频（count_file，即 process_text 的分词部分）
+#   rank      停用词过滤、加权与 Top50（rank_counts，整数ID + NumPy + 部分选择）
+#   counting  同样的过滤与 Top50，按原来的方式（字典推导 + sorted 全排序），
+#             与 rank 的结果核对一致，便于对比两种统计方式
+#   tables    词频总表，每个后端单独计时（记为 tables:<后端>），同时记录平均文件大小
+#   clouds    词云图（generate_wordcloud 的黑底白字样式）
+# 每个阶段在单独启动（spawn）的进程中运行，记录墙钟时间、CPU 时间、
+# 进程峰值内存（包括解释器本身）和每秒处理的词数，结果写入 JSON。
+# 两次结果可以对比，耗时或内存超过阈值的阶段标记为退化。
+#
+#   python bench.py run --sizes 1MB,16MB
+#   python bench.py run --sizes 1GB --stages segment,rank --stream
+#   python bench.py run --sizes 16MB --stages rank,counting
+#   python bench.py run --sizes "" --stages tables --tables png,pil --repeat 5
+#   python bench.py compare 基准结果/旧.json 基准结果/新.json --threshold 0.1
+
+RESULTS_DIR = "基准结果"
+CORPUS_DIR = "基准语料"
+STAGES = ["segment", "rank", "counting", "tables", "clouds"]
+
+
+# 进程的峰值内存（字节），无法获取时返回 None
+# Linux 上读 /proc 中的 VmHWM：ru_maxrss 会跨 exec 保留父进程的峰值，不能用于新启动的进程
+def peak_rss():
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+# 各阶段的执行函数：输入上一阶段的结果，返回 (本阶段结果, 处理的词数)
+def stage_segment(paths, options):
+    from segment import count_file
+    counts = [count_file(path, options['stream']) for path in paths]
+    return counts, sum(sum(c.values()) for c in counts)
+
+
+def stage_rank(all_counts, options):
+    from wordcount import rank_counts
+    from wordfilter import TokenFilter
+    token_filter = TokenFilter()
+    ranked = [rank_counts(counts, token_filter, 50) for counts in all_counts]
+    return ranked, sum(sum(c.values()) for c in all_counts)
+
+
+# 原来的统计方式（与改动前 process_text 的过滤、加权和排序相同）
+def legacy_rank(word_counts, token_filter, k):
+    filtered = token_filter.apply(word_counts)
+    sorted_words = sorted(filtered.items(), key=lambda x: x[1], reverse=True)
+    return filtered, sorted_words[:k], sum(filtered.values())
+
+
+def stage_counting(all_counts, options):
+    from wordfilter import TokenFilter
+    token_filter = TokenFilter()
+    ranked = [legacy_rank(counts, token_filter, 50) for counts in all_counts]
+    return ranked, sum(sum(c.values()) for c in all_counts)
+
+
+# 返回写出的各个文件的大小
+def stage_tables(ranked, options):
+    from tables import write_frequency_table
+    sizes = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for i, (_, top50, total) in enumerate(ranked):
+            top50_data = [(w, f, f"{f/total*100:.2f}%") for w, f in top50]
+            for output_file in write_frequency_table(f"bench{i}", top50_data, out_dir,
+                                                     options['tables']):
+                sizes.append(os.path.getsize(output_file))
+    return sizes, 0
+
+
+def stage_clouds(ranked, options):
+    from render import render_cloud, PLAIN_STYLE
+    with tempfile.TemporaryDirectory() as out_dir:
+        for i, (filtered, _, _) in enumerate(ranked):
+            render_cloud(dict(PLAIN_STYLE, words=filtered,
+                              output_file=os.path.join(out_dir, f"bench{i}.png")))
+    return None, 0
+
+
+# 各阶段的输入来自哪个阶段（None 为语料文件列表）
+UPSTREAM = {'segment': None, 'rank': 'segment', 'counting': 'segment',
+            'tables': 'rank', 'clouds': 'rank'}
+
+STAGE_FUNCS = {
+    'segment': stage_segment,
+    'rank': stage_rank,
+    'counting': stage_counting,
+    'tables': stage_tables,
+    'clouds': stage_clouds,
+}
+
+
+# 在测量进程中执行一个阶段（模块导入也计入耗时，与实际运行一致）
+def measure(stage, data, options):
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    result, tokens = STAGE_FUNCS[stage](data, options)
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    metrics = {
+        'wall': round(wall, 4),
+        'cpu': round(cpu, 4),
+        'peak_rss': peak_rss(),
+        'tokens': tokens,
+        'tokens_per_s': round(tokens / wall) if tokens and wall else None,
+    }
+    return result, metrics
+
+
+# 在新进程中执行一个阶段 repeat 次，取墙钟时间最短的一次
+def run_stage(stage, data, options, repeat):
+    ctx = multiprocessing.get_context("spawn")
+    best = result = None
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            result, metrics = pool.submit(measure, stage, data, options).result()
+        if best is None or metrics['wall'] < best['wall']:
+            best = metrics
+    return result, best
+
+
+# 依次运行一份语料的各阶段（未选中但下游需要的阶段只运行一次，不记录）
+def bench_corpus(name, paths, stages, options, repeat):
+    size = sum(os.path.getsize(p) for p in paths)
+    print(f"\n{name}（{len(paths)} 个文件，{synthcorpus.format_size(size)}）")
+    needed = set()
+    for stage in stages:
+        while stage is not None:
+            needed.add(stage)
+            stage = UPSTREAM[stage]
+    records = []
+    results = {None: paths}
+    for stage in STAGES:
+        if stage not in needed:
+            continue
+        data = results[UPSTREAM[stage]]
+        if stage == 'tables':
+            # 每个后端单独计时
+            variants = [(f"tables:{backend}", dict(options, tables=[backend]))
+                        for backend in options['tables']]
+        else:
+            variants = [(stage, options)]
+        for label, stage_options in variants:
+            results[stage], metrics = run_stage(stage, data, stage_options,
+                                                repeat if stage in stages else 1)
+            if stage not in stages:
+                continue
+            record = dict(corpus=name, bytes=size, stage=label, **metrics)
+            extra = ""
+            if stage == 'tables' and results[stage]:
+                record['output_bytes'] = round(sum(results[stage]) / len(results[stage]))
+                extra = f"平均大小 {synthcorpus.format_size(record['output_bytes'])}"
+            records.append(record)
+            rss = f"{metrics['peak_rss'] / (1 << 20):.0f}MB" if metrics['peak_rss'] else "-"
+            speed = f"{metrics['tokens_per_s']:,} 词/秒" if metrics['tokens_per_s'] else ""
+            print(f"  {label:<12} {metrics['wall']:9.3f}s  CPU {metrics['cpu']:9.3f}s  "
+                  f"峰值内存 {rss:>7}  {speed}{extra}")
+    if 'rank' in results and 'counting' in results:
+        # 两种统计方式的 Top50 和总词频必须相同
+        for new, old in zip(results['rank'], results['counting']):
+            if new[1:] != old[1:]:
+                print("  警告: counting 与 rank 的结果不一致")
+                break
+    return records
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cmd_run(args):
+    stages = args.stages.split(",")
+    options = {'stream': args.stream, 'tables': args.tables.split(",")}
+    corpora = []
+    if args.docs:
+        paths = sorted(glob.glob(os.path.join(args.docs, "*.txt")))
+        if paths:
+            corpora.append((args.docs, paths))
+        else:
+            print(f"警告: 在 '{args.docs}' 中没有找到文本文件")
+    for size in filter(None, args.sizes.split(",")):
+        path = synthcorpus.ensure_corpus(CORPUS_DIR, synthcorpus.parse_size(size), args.seed)
+        corpora.append((f"synth-{size}", [path]))
+
+    records = []
+    for name, paths in corpora:
+        records.extend(bench_corpus(name, paths, stages, options, args.repeat))
+
+    revision = git_revision()
+    report = {
+        'meta': {
+            'revision': revision,
+            'time': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'jieba': jieba_version(),
+            'seed': args.seed,
+            'options': options,
+        },
+        'results': records,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{revision or 'unknown'}.json")
+    out_dir = os.path.dirname(output)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"\n结果已保存: {output}")
+
+
+# 对比两次结果，返回退化的项数
+def compare(base, new, threshold):
+    old = {(r['corpus'], r['stage']): r for r in base['results']}
+    regressions = 0
+    print(f"{'语料':<14}{'阶段':<13}{'耗时':>22}{'峰值内存':>22}")
+    for r in new['results']:
+        b = old.get((r['corpus'], r['stage']))
+        if b is None:
+            continue
+        flags = []
+        wall = r['wall'] / b['wall'] - 1 if b['wall'] else 0
+        if wall > threshold:
+            flags.append("耗时退化")
+        rss = None
+        if r.get('peak_rss') and b.get('peak_rss'):
+            rss = r['peak_rss'] / b['peak_rss'] - 1
+            if rss > threshold:
+                flags.append("内存退化")
+        regressions += bool(flags)
+        rss_text = f"{rss:+.1%}" if rss is not None else "-"
+        print(f"{r['corpus']:<14}{r['stage']:<13}{b['wall']:9.3f}s→{r['wall']:8.3f}s {wall:+7.1%}"
+              f"{rss_text:>14}  {' '.join(flags)}")
+    return regressions
+
+
+def cmd_compare(args):
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.new, encoding='utf-8') as f:
+        new = json.load(f)
+    print(f"基准 {base['meta'].get('revision')}  →  对比 {new['meta'].get('revision')}")
+    regressions = compare(base, new, args.threshold)
+    if regressions:
+        print(f"\n{regressions} 项超过阈值 {args.threshold:.0%}")
+        sys.exit(1)
+    print("\n没有退化")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流水线基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="运行基准测试")
+    run.add_argument("--docs", default="xxx", help="真实语料文件夹（为空时跳过）")
+    run.add_argument("--sizes", default="1MB,16MB", help="合成语料大小，逗号分隔（1MB 至 1GB）")
+    run.add_argument("--seed", type=int, default=0, help="合成语料的随机种子")
+    run.add_argument("--stages", default=",".join(STAGES), help="要计时的阶段，逗号分隔")
+    run.add_argument("--tables", default=",".join(TABLE_BACKENDS),
+                     help="tables 阶段计时的表格后端，逗号分隔（默认全部）")
+    run.add_argument("--stream", action="store_true", help="segment 阶段使用流式分词")
+    run.add_argument("--repeat", type=int, default=1, help="每个阶段重复次数（取最快一次）")
+    run.add_argument("--output", help="结果文件（默认 基准结果/<时间>-<版本>.json）")
+    run.set_defaults(func=cmd_run)
+
+    cmp = sub.add_parser("compare", help="对比两次结果")
+    cmp.add_argument("base", help="基准结果")
+    cmp.add_argument("new", help="新结果")
+    cmp.add_argument("--threshold", type=float, default=0.1, help="退化阈值（默认 0.1，即 10%%）")
+    cmp.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
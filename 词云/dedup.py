@@ -0,0 +1,224 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+
+import lazyload
+from synthcorpus import format_size
+
+# 段落级去重（完全重复 + MinHash/LSH 近似重复）
+#
+# 按不同关键词抓取的搜索结果经常重复同一段政策原文，既增加分词工作量，也抬高词频。
+# 每个文件逐段（一行为一段）流式处理，只保留每段第一次出现的位置：
+#   完全重复  去掉空白、标点后的段落内容相同（8 字节 blake2b 哈希集合）
+#   近似重复  按 SHINGLE 个字的片段计算 NUM_PERM 个 MinHash，分成 BANDS 段做 LSH，
+#            任意一段与之前某个段落相同即视为近似重复（约 0.85 以上的相似度大概率命中）
+# 规范化后短于 MIN_CHARS 个字的段落（标题、"第一条"、空行等）一律保留。
+# 每批约 BATCH_CHARS 个字符一起用 NumPy 计算 MinHash，内存只与不同段落的数量有关，
+# 耗时与文件大小成线性关系。去重后的文件写入 去重语料/<完全|近似>/，
+# 原文件和去重参数都没有变化时直接复用（统计结果和参数保存在 <文件>.stats.json 中，
+# 复用时同样报告）；
+# 保留的段落原样输出，新追加的内容去重后仍然是追加，
+# 增量统计（见 incremental）照常生效。
+#
+#   python dedup.py                 对 xxx/ 中的全部文件去重并报告删除的字节数
+#   python dedup.py --exact-only    只删除完全重复的段落
+
+DEDUP_DIR = "去重语料"
+
+MIN_CHARS = 20          # 规范化后至少多少个字才参与去重
+SHINGLE = 5             # MinHash 片段长度（字）
+NUM_PERM = 32           # MinHash 个数
+BANDS = 4               # LSH 分段数（每段 NUM_PERM // BANDS 个 MinHash）
+BATCH_CHARS = 1 << 22   # 每批处理的字符数
+
+_STRIP = re.compile(r'[\W_]+')
+
+_MASK64 = (1 << 64) - 1
+
+
+class Deduplicator:
+    """一个文件内的去重状态：已出现段落的哈希和 LSH 分段"""
+
+    def __init__(self, near=True, seed=0):
+        np = lazyload.load("numpy")
+        rng = np.random.default_rng(seed)
+        self.near = near
+        # 每个 MinHash 为一个随机的 h -> a*h + b (mod 2^64)，a 取奇数
+        self.a = rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+        self.band_mix = rng.integers(0, 1 << 63, NUM_PERM // BANDS, dtype=np.uint64) | np.uint64(1)
+        self.band_salt = rng.integers(0, 1 << 63, BANDS, dtype=np.uint64)
+        self.exact = set()
+        self.bands = set()
+        self.paragraphs = 0
+        self.exact_removed = 0
+        self.near_removed = 0
+        self.bytes_in = 0
+        self.bytes_removed = 0
+
+    # 一批段落（已规范化、长度都不小于 MIN_CHARS）的 LSH 分段键，形状为 (段落数, BANDS)
+    def band_keys(self, texts):
+        np = lazyload.load("numpy")
+        codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        # 每个位置开始的 SHINGLE 个字的多项式哈希（uint64 自然溢出）
+        n = len(codes) - SHINGLE + 1
+        shingles = codes[:n].copy()
+        for j in range(1, SHINGLE):
+            shingles *= np.uint64(1000003)
+            shingles += codes[j:j + n]
+        # 跨越段落边界的片段不算
+        valid = np.ones(n, dtype=bool)
+        crossing = (ends[:, None] - np.arange(1, SHINGLE)[None, :]).ravel()
+        valid[crossing[crossing < n]] = False
+        signature = np.empty((len(texts), NUM_PERM), dtype=np.uint64)
+        values = np.empty(n, dtype=np.uint64)
+        for k in range(NUM_PERM):
+            np.multiply(shingles, self.a[k], out=values)
+            values += self.b[k]
+            values[~valid] = _MASK64
+            signature[:, k] = np.minimum.reduceat(values, starts) >> np.uint64(32)
+        rows = NUM_PERM // BANDS
+        keys = (signature.reshape(len(texts), BANDS, rows) * self.band_mix).sum(axis=2)
+        return keys ^ self.band_salt
+
+    # 返回一批行是否保留
+    def filter_lines(self, lines):
+        keep = [True] * len(lines)
+        candidates = []
+        texts = []
+        exact = self.exact
+        for i, line in enumerate(lines):
+            text = _STRIP.sub("", line).lower()
+            if len(text) < MIN_CHARS:
+                continue
+            self.paragraphs += 1
+            digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+            if digest in exact:
+                keep[i] = False
+                self.exact_removed += 1
+                continue
+            exact.add(digest)
+            candidates.append(i)
+            texts.append(text)
+        if self.near and candidates:
+            bands = self.bands
+            for i, keys in zip(candidates, self.band_keys(texts).tolist()):
+                if any(key in bands for key in keys):
+                    keep[i] = False
+                    self.near_removed += 1
+                else:
+                    bands.update(keys)
+        for line, kept in zip(lines, keep):
+            size = len(line.encode("utf-8"))
+            self.bytes_in += size
+            if not kept:
+                self.bytes_removed += size
+        return keep
+
+    def stats(self):
+        return {"paragraphs": self.paragraphs, "exact_removed": self.exact_removed,
+                "near_removed": self.near_removed, "bytes_in": self.bytes_in,
+                "bytes_removed": self.bytes_removed}
+
+
+# 一个文件的去重统计 → 报告文字
+def summarize(stats):
+    share = stats["bytes_removed"] / stats["bytes_in"] * 100 if stats["bytes_in"] else 0
+    return (f"完全重复 {stats['exact_removed']} 段，近似重复 {stats['near_removed']} 段，"
+            f"删除 {format_size(stats['bytes_removed'])}（{share:.1f}%）")
+
+
+def stats_path(dst):
+    return f"{dst}.stats.json"
+
+
+# 影响去重结果的参数（与统计一起保存，参数变化时不复用上次的结果）
+def dedup_params(near=True):
+    return {"near": near, "min_chars": MIN_CHARS, "shingle": SHINGLE,
+            "num_perm": NUM_PERM, "bands": BANDS}
+
+
+# 读取保存的去重统计，没有或损坏时返回 None
+def load_stats(dst):
+    try:
+        with open(stats_path(dst), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# 流式去重一个文件，写入 dst（统计写入 stats_path(dst)），返回统计
+def dedup_file(src, dst, near=True):
+    dedup = Deduplicator(near)
+    out_dir = os.path.dirname(dst)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    # newline='' 保持原有换行符，保留的段落与原文逐字节相同
+    with open(src, "r", encoding="utf-8", newline="") as fin, \
+            open(tmp, "w", encoding="utf-8", newline="") as fout:
+        batch = []
+        size = 0
+        for line in fin:
+            batch.append(line)
+            size += len(line)
+            if size >= BATCH_CHARS:
+                fout.writelines(l for l, k in zip(batch, dedup.filter_lines(batch)) if k)
+                batch = []
+                size = 0
+        if batch:
+            fout.writelines(l for l, k in zip(batch, dedup.filter_lines(batch)) if k)
+    os.replace(tmp, dst)
+    stats = dedup.stats()
+    with open(stats_path(dst), "w", encoding="utf-8") as f:
+        json.dump(dict(stats, params=dedup_params(near)), f)
+    return stats
+
+
+# 对一组文件去重，返回 {原文件: 去重后的文件}；原文件没有变化时复用上次的结果
+def dedup_files(paths, out_dir=DEDUP_DIR, near=True):
+    out_dir = os.path.join(out_dir, "近似" if near else "完全")
+    results = {}
+    for src in paths:
+        dst = os.path.join(out_dir, os.path.basename(src))
+        stats = None
+        if os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src):
+            stats = load_stats(dst)
+            if stats is not None and stats.pop("params", None) != dedup_params(near):
+                stats = None
+        if stats is None:
+            stats = dedup_file(src, dst, near)
+            print(f"去重 {os.path.basename(src)}: {summarize(stats)}")
+        else:
+            print(f"去重 {os.path.basename(src)}: {summarize(stats)}（未变化，复用上次的结果）")
+        results[src] = dst
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="段落级去重")
+    parser.add_argument("--docs", default="xxx", help="语料文件夹（默认 xxx）")
+    parser.add_argument("--output", default=DEDUP_DIR, help=f"输出文件夹（默认 {DEDUP_DIR}）")
+    parser.add_argument("--exact-only", action="store_true", help="只删除完全重复的段落")
+    args = parser.parse_args()
+    near = not args.exact_only
+    out_dir = os.path.join(args.output, "近似" if near else "完全")
+    total_in = total_removed = 0
+    for src in sorted(glob.glob(os.path.join(args.docs, "*.txt"))):
+        stats = dedup_file(src, os.path.join(out_dir, os.path.basename(src)), near)
+        print(f"{os.path.basename(src)}: {summarize(stats)}")
+        total_in += stats["bytes_in"]
+        total_removed += stats["bytes_removed"]
+    if total_in:
+        print(f"合计删除 {format_size(total_removed)} / {format_size(total_in)}"
+              f"（{total_removed / total_in * 100:.1f}%），结果保存在 {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
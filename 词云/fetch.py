@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import os
+import re
+from html.parser import HTMLParser
+from urllib.parse import quote
+
+import lazyload
+
+# 无界面抓取：并发请求搜索结果页，提取正文文本，直接写入 xxx/<工作表名>.txt
+#
+# 使用 aiohttp 的连接池并发请求，CONCURRENCY 限制同时进行的请求数，
+# RATE_LIMIT 限制每秒发出的请求数。每个页面抓到后立即提取正文并追加
+# 写入输出文件，不在内存中积累所有页面。
+# SEARCH_URL 可以换成本地的模拟服务器地址，便于离线测试。
+# 传入 searchcache.ResponseCache 时，有效期内的结果页直接从缓存读取，不发请求；
+# 缓存的读写在线程池中进行，不阻塞事件循环，超出容量的条目在全部抓取结束后统一淘汰。
+# 输出文件中已有的正文（例如重新运行时命中缓存的关键词）不再重复追加。
+
+SEARCH_URL = "https://www.baidu.com/s?wd={keyword}"
+CONCURRENCY = 4       # 同时进行的请求数
+RATE_LIMIT = 2.0      # 每秒最多发出的请求数（0 表示不限制）
+TIMEOUT = 20          # 单个请求超时（秒）
+OUTPUT_DIR = "xxx"
+
+HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"),
+}
+
+# 不包含正文的标签
+SKIP_TAGS = {"script", "style", "noscript", "head", "template", "svg", "iframe"}
+# 块级标签，结束时换段
+BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6",
+              "section", "article", "table", "ul", "ol", "dd", "dt"}
+
+_SPACES = re.compile(r"[ \t\r\f\v　\xa0]+")
+
+
+class TextExtractor(HTMLParser):
+    """从 HTML 中提取正文文本，块级标签处分段"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+# 提取正文：去掉脚本样式，合并空白，去掉空行
+def extract_text(html):
+    parser = TextExtractor()
+    parser.feed(html)
+    parser.close()
+    lines = (_SPACES.sub(" ", line).strip() for line in "".join(parser.parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+# 关键词 → 搜索地址
+def search_url_for(keyword, search_url=SEARCH_URL):
+    return search_url.format(keyword=quote(keyword))
+
+
+class RateLimiter:
+    """按固定间隔放行请求，保证每秒不超过 rate 个"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate and rate > 0 else 0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# 一段正文的哈希（用于判断输出文件中是否已有这段正文）
+def block_digest(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+# 输出文件中已有的正文块（以空行分隔）的哈希，逐行读取
+def existing_blocks(path):
+    digests = set()
+    if not os.path.exists(path):
+        return digests
+    block = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.strip():
+                block.append(line)
+            elif block:
+                digests.add(block_digest("\n".join(block)))
+                block = []
+    if block:
+        digests.add(block_digest("\n".join(block)))
+    return digests
+
+
+# 请求一个页面，返回 HTML 文本
+async def fetch_page(session, limiter, url):
+    await limiter.wait()
+    async with session.get(url) as resp:
+        resp.raise_for_status()
+        return await resp.text(errors="replace")
+
+
+# 并发抓取一组关键词，正文逐个追加写入 output_file，返回 (成功数, 失败数)
+# on_done(keyword) 在每个关键词的正文写入后调用（用于记录已完成的关键词），
+# 请求失败或页面没有正文时不调用
+async def fetch_keywords(keywords, output_file, search_url=SEARCH_URL,
+                         concurrency=CONCURRENCY, rate=RATE_LIMIT, timeout=TIMEOUT,
+                         on_done=None, cache=None):
+    aiohttp = lazyload.load("aiohttp")
+    loop = asyncio.get_running_loop()
+    limiter = RateLimiter(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+    done = failed = 0
+
+    async def worker(session, keyword):
+        url = search_url_for(keyword, search_url)
+        key = cache.key_for(keyword, search_url) if cache is not None else None
+        html = await loop.run_in_executor(None, cache.get, key) if cache is not None else None
+        if html is None:
+            async with semaphore:
+                try:
+                    html = await fetch_page(session, limiter, url)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    return keyword, None, e
+            if cache is not None:
+                # 缓存写入失败（磁盘已满、没有权限等）不影响本次抓取
+                try:
+                    await loop.run_in_executor(None, cache.put, key, url, html)
+                except OSError as e:
+                    print(f"  缓存写入失败: {keyword} ({e})")
+        return keyword, extract_text(html), None
+
+    out_dir = os.path.dirname(output_file)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    written = existing_blocks(output_file)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout,
+                                     headers=HEADERS) as session:
+        tasks = [asyncio.create_task(worker(session, kw)) for kw in keywords]
+        with open(output_file, "a", encoding="utf-8") as out:
+            for finished in asyncio.as_completed(tasks):
+                keyword, text, error = await finished
+                if error is not None:
+                    failed += 1
+                    print(f"  抓取失败: {keyword} ({error})")
+                    continue
+                # 没有正文（验证页、空白页等）算作失败，不记录为已完成，下次重新抓取
+                if not text:
+                    failed += 1
+                    print(f"  抓取失败: {keyword}（页面没有正文）")
+                    continue
+                digest = block_digest(text)
+                if digest in written:
+                    print(f"  已抓取: {keyword}（正文已在输出文件中，不再追加）")
+                else:
+                    out.write(text + "\n\n")
+                    out.flush()
+                    written.add(digest)
+                    print(f"  已抓取: {keyword}")
+                done += 1
+                if on_done is not None:
+                    on_done(keyword)
+    if cache is not None:
+        await loop.run_in_executor(None, cache.evict)
+    return done, failed
+
+
+# 同步入口
+def run_fetch(keywords, output_file, **options):
+    return asyncio.run(fetch_keywords(keywords, output_file, **options))
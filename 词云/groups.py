@@ -0,0 +1,140 @@
+import os
+
+import lazyload
+from tables import load_font
+
+# 上海市十六区分组展示图：每组一张，上半部分为 Top10 高频词表，下半部分为各区词云图
+# districts_data 为 {区名: {'top_words': [(词, 词频), ...]}}
+# images 为 {区名: 词云图数组}（WordCloud.to_array 的结果，见 render.render_clouds(arrays=True)），
+# 没有传入的区从 output_dir 中读取已保存的词云图。
+# 标题、表格和各区词云图直接用 PIL 画在同一张画布上，每组只在保存时编码一次 PNG，
+# 各区的词云图 PNG 不再需要先写入磁盘、再读回来。
+
+# 定义上海市16个区的分组
+district_groups = [
+    ["黄浦区", "徐汇区", "长宁区", "静安区"],
+    ["普陀区", "虹口区", "杨浦区", "浦东新区"],
+    ["闵行区", "宝山区", "嘉定区", "金山区"],
+    ["松江区", "青浦区", "奉贤区", "崇明区"]
+]
+
+# 画布尺寸与字号（按 300 dpi 换算，与原来 20×14 英寸的图表大致相同）
+# 字体与词频总表相同（tables.load_font，字体文件不可用时退回 PIL 默认字体）
+DPI = 300
+CANVAS_WIDTH = 20 * DPI
+MARGIN = DPI // 4
+TITLE_SIZE = 22 * DPI // 72          # 22 磅
+TABLE_FONT_SIZE = 14 * DPI // 72     # 14 磅
+ROW_HEIGHT = TABLE_FONT_SIZE * 2
+TOP_COLUMN_WIDTH = 4 * TABLE_FONT_SIZE
+PANEL_TITLE_SIZE = 16 * DPI // 72    # 16 磅
+PANEL_HEIGHT = 6 * DPI               # 词云图的最大高度
+HEADER_COLOR = '#E6E6E6'
+LINE_COLOR = 'black'
+
+
+# 表头和 Top10 表格内容（每个区占两列：区名和词频）
+def table_rows(valid_districts, districts_data):
+    header_row = [""]
+    for d in valid_districts:
+        header_row.extend([d, "词频"])
+    rows = []
+    for i in range(10):  # Top 10
+        row = [f"Top{i+1}"]
+        for district in valid_districts:
+            if i < len(districts_data[district]['top_words']):
+                word, freq = districts_data[district]['top_words'][i]
+                row.extend([word, str(freq)])
+            else:
+                row.extend(["", ""])
+        rows.append(row)
+    return header_row, rows
+
+
+# 在画布上 (left, top) 处画表格，返回表格高度
+def draw_table(draw, left, top, width, header_row, rows, font):
+    other = (width - TOP_COLUMN_WIDTH) / (len(header_row) - 1)
+    edges = [left, left + TOP_COLUMN_WIDTH]
+    edges += [round(left + TOP_COLUMN_WIDTH + other * (j + 1)) for j in range(len(header_row) - 1)]
+    for i, row in enumerate([header_row] + rows):
+        y = top + i * ROW_HEIGHT
+        for j, text in enumerate(row):
+            box = (edges[j], y, edges[j + 1], y + ROW_HEIGHT)
+            draw.rectangle(box, fill=HEADER_COLOR if i == 0 else None, outline=LINE_COLOR, width=2)
+            if text:
+                # 表头加粗（描边）
+                draw.text(((box[0] + box[2]) / 2, (box[1] + box[3]) / 2), text, font=font,
+                          fill=LINE_COLOR, anchor="mm", stroke_width=1 if i == 0 else 0,
+                          stroke_fill=LINE_COLOR)
+    return ROW_HEIGHT * (len(rows) + 1)
+
+
+# 读取或取出一个区的词云图，返回 PIL 图片（数组不复制，只在缩放时生成新图）
+def district_image(district, images, output_dir):
+    Image = lazyload.load("PIL.Image")
+    if images is not None and district in images:
+        return Image.fromarray(images[district])
+    img_path = os.path.join(output_dir, f"{district}_词云图.png")
+    if not os.path.exists(img_path):
+        print(f"警告: 找不到词云图 {img_path}")
+        return None
+    return Image.open(img_path).convert("RGB")
+
+
+# 创建分组展示图，返回输出文件（没有有效数据时返回 None）
+def create_group_visualization(group_idx, districts_data, output_dir, images=None):
+    Image = lazyload.load("PIL.Image")
+    ImageDraw = lazyload.load("PIL.ImageDraw")
+    group = district_groups[group_idx]
+    group_name = f"第{group_idx+1}组"
+
+    # 检查组内所有区是否都有数据
+    valid_districts = [d for d in group if d in districts_data]
+    if not valid_districts:
+        print(f"警告: {group_name}没有有效的区域数据，跳过生成")
+        return
+
+    header_row, rows = table_rows(valid_districts, districts_data)
+    title_font = load_font(TITLE_SIZE)
+    table_font = load_font(TABLE_FONT_SIZE)
+    panel_font = load_font(PANEL_TITLE_SIZE)
+
+    # 各区词云图等比缩放到各自的格子中
+    panel_width = (CANVAS_WIDTH - 2 * MARGIN) // len(valid_districts)
+    panels = []
+    for district in valid_districts:
+        img = district_image(district, images, output_dir)
+        if img is not None:
+            scale = min((panel_width - MARGIN // 2) / img.width, PANEL_HEIGHT / img.height)
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            if size != img.size:
+                img = img.resize(size, Image.LANCZOS)
+        panels.append(img)
+
+    # 各部分的纵向位置：总标题、表格、各区标题、词云图
+    table_top = MARGIN + TITLE_SIZE * 2
+    panels_top = table_top + ROW_HEIGHT * (len(rows) + 1) + MARGIN
+    images_top = panels_top + PANEL_TITLE_SIZE * 3 // 2
+    height = images_top + max((img.height for img in panels if img is not None), default=0) + MARGIN
+
+    canvas = Image.new("RGB", (CANVAS_WIDTH, height), "white")
+    draw = ImageDraw.Draw(canvas)
+    draw.text((CANVAS_WIDTH / 2, MARGIN + TITLE_SIZE / 2),
+              f"上海市十六区Top10高频特征词与词云图 - {group_name}",
+              font=title_font, fill=LINE_COLOR, anchor="mm")
+    draw_table(draw, MARGIN, table_top, CANVAS_WIDTH - 2 * MARGIN, header_row, rows, table_font)
+
+    # 在下半部分均匀排列词云图（在各自的格子中居中）
+    for i, (district, img) in enumerate(zip(valid_districts, panels)):
+        left = MARGIN + i * panel_width
+        draw.text((left + panel_width / 2, panels_top + PANEL_TITLE_SIZE / 2), district,
+                  font=panel_font, fill=LINE_COLOR, anchor="mm")
+        if img is not None:
+            canvas.paste(img, (left + (panel_width - img.width) // 2, images_top))
+
+    # 保存图表（整组只编码一次）
+    output_file = os.path.join(output_dir, f"上海市十六区_{group_name}_Top10高频特征词与词云图.png")
+    canvas.save(output_file, dpi=(DPI, DPI))
+
+    print(f"已生成分组可视化: {output_file}")
+    return output_file
@@ -0,0 +1,130 @@
+import gzip
+import hashlib
+import json
+import os
+from collections import Counter
+
+import segment
+from segcache import env_digest
+
+# 追加模式的增量统计
+#
+# xxx/<城市>.txt 通常是不断往末尾粘贴新内容。对每个文件记录已处理到的
+# 字节位置（总是对齐到某个换行符之后）、这部分内容的哈希以及它的词频。
+# 再次运行时只对新追加的部分分词并合并；如果已处理部分的内容变了
+# （不是单纯追加，例如改动了中间的段落），则回退为全量重新统计。
+# 换行符不计入词频（见 segment），处理位置两侧的空行在分开统计和整体统计时
+# 不会一个算两次、一个算一次，已处理部分与追加部分的词频相加与全量统计逐词相同。
+
+STATE_DIR = "增量状态"
+
+_READ_SIZE = 1 << 20
+
+
+# 计算文件前 length 个字节的哈希
+def prefix_digest(path, length):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        remaining = length
+        while remaining > 0:
+            block = f.read(min(_READ_SIZE, remaining))
+            if not block:
+                break
+            h.update(block)
+            remaining -= len(block)
+    return h.hexdigest()
+
+
+# 文件中最后一个换行符之后的位置（没有换行符时为0）
+def last_line_end(path):
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        pos = size
+        while pos > 0:
+            start = max(0, pos - _READ_SIZE)
+            f.seek(start)
+            block = f.read(pos - start)
+            idx = block.rfind(b"\n")
+            if idx >= 0:
+                return start + idx + 1
+            pos = start
+    return 0
+
+
+# 统计文件中一段字节范围的词频
+def count_bytes(path, start, end):
+    if end <= start:
+        return Counter()
+    return segment.count_text(segment.read_range(path, start, end))
+
+
+class IncrementalCounter:
+    """按文件记录已处理的前缀，只对追加的部分分词"""
+
+    def __init__(self, state_dir=STATE_DIR):
+        self.state_dir = state_dir
+        self.appended = 0
+        self.recounted = 0
+
+    def _state_path(self, path):
+        name = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+        return os.path.join(self.state_dir, f"{name}.json.gz")
+
+    def _load(self, path):
+        try:
+            with gzip.open(self._state_path(path), "rt", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        if state.get("env") != env_digest():
+            return None
+        return state
+
+    def _save(self, path, offset, digest, counts):
+        os.makedirs(self.state_dir, exist_ok=True)
+        state_path = self._state_path(path)
+        tmp = f"{state_path}.{os.getpid()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump({"path": path, "env": env_digest(), "offset": offset,
+                       "prefix_sha256": digest, "counts": list(counts.items())},
+                      f, ensure_ascii=False)
+        os.replace(tmp, state_path)
+
+    # 只统计追加的部分；不能增量处理时返回 None
+    def try_append(self, path):
+        state = self._load(path)
+        if state is None:
+            return None
+        offset = state["offset"]
+        size = os.path.getsize(path)
+        if size < offset or prefix_digest(path, offset) != state["prefix_sha256"]:
+            print(f"  {os.path.basename(path)} 的已处理内容有改动，重新全量统计")
+            return None
+
+        counts = Counter(dict(state["counts"]))
+        line_end = last_line_end(path)
+        if line_end > offset:
+            # 新增的完整段落计入状态
+            counts.update(count_bytes(path, offset, line_end))
+            self._save(path, line_end, prefix_digest(path, line_end), counts)
+        # 末尾还没有换行的半段只计入本次结果，下次追加时重新统计
+        tail = count_bytes(path, max(offset, line_end), size)
+        self.appended += 1
+        if not tail:
+            return counts
+        result = Counter(counts)
+        result.update(tail)
+        return result
+
+    # 记录全量统计的结果，作为之后增量统计的起点
+    def record(self, path, counts):
+        line_end = last_line_end(path)
+        size = os.path.getsize(path)
+        prefix_counts = counts
+        if line_end < size:
+            # 去掉末尾半段的词频，只保存到最后一个换行符为止的部分
+            prefix_counts = Counter(counts)
+            prefix_counts.subtract(count_bytes(path, line_end, size))
+            prefix_counts = Counter({k: v for k, v in prefix_counts.items() if v > 0})
+        self._save(path, line_end, prefix_digest(path, line_end), prefix_counts)
+        self.recounted += 1
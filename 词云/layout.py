@@ -0,0 +1,211 @@
+import gzip
+import hashlib
+import json
+import os
+
+import lazyload
+from segcache import file_digest
+
+# 词云图布局缓存与增量重排
+#
+# WordCloud.fit_words 每次都从空白画布开始，在占用积分图上逐个搜索每个词的位置，
+# 是渲染中最慢的一步。这里按「输出文件 + 样式 + 背景图 + 字体」为每张图保存一份
+# 布局（每个词的位置、字号、方向和颜色）：
+#   - 词频与上次完全相同时直接使用保存的布局，不再搜索（图片与重新布局完全相同）
+#   - relayout=True 且词频只是略有变化（例如调整了停用词）时，词频相对变化不超过
+#     RESIZE_TOLERANCE 的词保持原位置和字号，只为新出现或大小变化的词搜索位置；
+#     变化的词超过 MAX_CHANGED 时仍然整体重新布局
+# 增量重排按与 WordCloud 相同的规则计算字号、选择方向和搜索位置，使用同一个
+# random_state，同样的上次布局和词频总是得到同样的结果。
+
+LAYOUT_DIR = "布局缓存"
+
+# 布局规则或保存格式有变化时加一，使旧布局失效
+LAYOUT_VERSION = 1
+
+# 归一化词频的相对变化不超过此比例的词保持原位
+RESIZE_TOLERANCE = 0.1
+
+# 需要重新放置的词超过此比例时整体重新布局
+MAX_CHANGED = 0.5
+
+
+# 与 WordCloud.generate_from_frequencies 相同：稳定排序、取前 max_words 个、按最大值归一化
+def normalized_words(words, max_words):
+    top = sorted(words.items(), key=lambda x: x[1], reverse=True)[:max_words]
+    if not top or not top[0][1]:
+        return []
+    max_freq = float(top[0][1])
+    return [(word, freq / max_freq) for word, freq in top]
+
+
+# 一张图的布局槽位：输出文件和会影响布局的样式参数（不含词频）
+def slot_key(job):
+    wordcloud = lazyload.load("wordcloud")
+    options = dict(job.get('options', {}))
+    font_path = options.get('font_path')
+    h = hashlib.sha256()
+    h.update(json.dumps({
+        'version': LAYOUT_VERSION,
+        'wordcloud': wordcloud.__version__,
+        'output_file': job['output_file'],
+        'options': options,
+        'colors': job.get('colors'),
+        'color': job.get('color'),
+        'font': file_digest(font_path) if font_path and os.path.isfile(font_path) else None,
+        'mask': file_digest(job['mask']) if job.get('mask') else None,
+    }, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+def words_key(freqs):
+    return hashlib.sha256(json.dumps(freqs, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def layout_path(cache_dir, key):
+    return os.path.join(cache_dir, f"{key}.json.gz")
+
+
+# 读取保存的布局，返回 (词频键, [(词, 归一化词频, 字号, x, y, 方向, 颜色)])，没有时返回 None
+def load_layout(path):
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, OSError, ValueError):
+        return None
+    return data['words'], [tuple(entry) for entry in data['layout']]
+
+
+def save_layout(path, key, wordcloud):
+    layout = [[word, freq, int(size), int(pos[0]), int(pos[1]),
+               None if orientation is None else int(orientation), color]
+              for (word, freq), size, pos, orientation, color in wordcloud.layout_]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump({'words': key, 'layout': layout}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+# 把保存的布局装回 WordCloud 对象（之后可以直接 to_image / to_file）
+def apply_layout(wordcloud, layout):
+    Image = lazyload.load("PIL.Image")
+    wordcloud.layout_ = [((word, freq), size, (x, y),
+                          None if orientation is None else Image.Transpose(orientation), color)
+                         for word, freq, size, x, y, orientation, color in layout]
+    wordcloud.words_ = {word: freq for word, freq, *_ in layout}
+    return wordcloud
+
+
+# 在上次布局的基础上增量重排，返回是否成功（需要重新放置的词太多时返回 False）
+def relayout_words(wordcloud, freqs, old_layout):
+    np = lazyload.load("numpy")
+    Image = lazyload.load("PIL.Image")
+    ImageDraw = lazyload.load("PIL.ImageDraw")
+    ImageFont = lazyload.load("PIL.ImageFont")
+    IntegralOccupancyMap = lazyload.load("wordcloud.wordcloud").IntegralOccupancyMap
+    wc = wordcloud
+    if wc.repeat or wc.max_font_size is None:
+        return False
+
+    old = {entry[0]: entry for entry in old_layout}
+    kept = {}
+    for word, freq in freqs:
+        entry = old.get(word)
+        if entry is not None and abs(freq - entry[1]) <= RESIZE_TOLERANCE * entry[1]:
+            kept[word] = entry
+    if len(freqs) - len(kept) > MAX_CHANGED * len(freqs):
+        return False
+
+    if wc.mask is not None:
+        boolean_mask = wc._get_bolean_mask(wc.mask)
+        height, width = wc.mask.shape[:2]
+    else:
+        boolean_mask = None
+        height, width = wc.height, wc.width
+    occupancy = IntegralOccupancyMap(height, width, boolean_mask)
+    img_grey = Image.new("L", (width, height))
+    draw = ImageDraw.Draw(img_grey)
+
+    def draw_word(word, size, x, y, orientation):
+        font = ImageFont.TransposedFont(ImageFont.truetype(wc.font_path, size),
+                                        orientation=orientation)
+        draw.text((y, x), word, fill="white", font=font)
+
+    # 先画出保持不动的词，一次性重算积分图
+    for word, entry in kept.items():
+        _, _, size, x, y, orientation, _ = entry
+        draw_word(word, size, x, y, None if orientation is None else Image.Transpose(orientation))
+
+    def occupied():
+        img_array = np.asarray(img_grey)
+        return img_array if boolean_mask is None else img_array + boolean_mask
+
+    occupancy.update(occupied(), 0, 0)
+
+    # 按词频从高到低放置其余的词；字号按 WordCloud 的规则由前一个词的字号推算
+    random_state = wc.random_state
+    layout = []
+    font_size = wc.max_font_size
+    last_freq = 1.
+    rs = wc.relative_scaling
+    full = False
+    for word, freq in freqs:
+        if word in kept:
+            _, _, size, x, y, orientation, color = kept[word]
+            layout.append(((word, freq), size, (x, y),
+                           None if orientation is None else Image.Transpose(orientation), color))
+            font_size, last_freq = size, freq
+            continue
+        if full:
+            continue
+        if rs != 0:
+            font_size = int(round((rs * (freq / float(last_freq)) + (1 - rs)) * font_size))
+        orientation = None if random_state.random() < wc.prefer_horizontal else Image.ROTATE_90
+        tried_other_orientation = False
+        result = None
+        while font_size >= wc.min_font_size:
+            font = ImageFont.TransposedFont(ImageFont.truetype(wc.font_path, font_size),
+                                            orientation=orientation)
+            box_size = draw.textbbox((0, 0), word, font=font, anchor="lt")
+            result = occupancy.sample_position(box_size[3] + wc.margin, box_size[2] + wc.margin,
+                                               random_state)
+            if result is not None:
+                break
+            if not tried_other_orientation and wc.prefer_horizontal < 1:
+                orientation = Image.ROTATE_90
+                tried_other_orientation = True
+            else:
+                font_size -= wc.font_step
+                orientation = None
+        if result is None:
+            # 画布已满：与 WordCloud 相同，之后的新词都不再放置（保持不动的词仍然保留）
+            full = True
+            continue
+        x, y = (int(v) + wc.margin // 2 for v in result)
+        draw_word(word, font_size, x, y, orientation)
+        color = wc.color_func(word, font_size=font_size, position=(x, y),
+                              orientation=orientation, random_state=random_state,
+                              font_path=wc.font_path)
+        layout.append(((word, freq), font_size, (x, y), orientation, color))
+        occupancy.update(occupied(), x, y)
+        last_freq = freq
+
+    wc.layout_ = layout
+    wc.words_ = dict(freqs)
+    return True
+
+
+# 带布局缓存的 fit_words：词频相同时复用布局，relayout=True 时增量重排，否则重新布局
+def fit_cached(wordcloud, job, cache_dir=LAYOUT_DIR, relayout=False):
+    freqs = normalized_words(job['words'], wordcloud.max_words)
+    path = layout_path(cache_dir, slot_key(job))
+    key = words_key(freqs)
+    saved = load_layout(path)
+    if saved is not None and saved[0] == key:
+        return apply_layout(wordcloud, saved[1])
+    if not (saved is not None and relayout and freqs
+            and relayout_words(wordcloud, freqs, saved[1])):
+        wordcloud.fit_words(job['words'])
+    save_layout(path, key, wordcloud)
+    return wordcloud
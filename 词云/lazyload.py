@@ -0,0 +1,55 @@
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+
+# 重量级模块的延迟导入与启动耗时统计
+#
+# jieba、wordcloud、matplotlib、numpy、PIL 等模块只在真正用到的阶段才导入，
+# 只统计词频或者命中缓存的运行不必为它们付出启动时间。
+# 每个模块首次导入（以及 jieba 词典加载）的耗时记录在 startup_times 中。
+
+startup_times = {}
+
+_pyplot_ready = False
+
+
+# 记录一段代码的耗时（同名累加）
+@contextmanager
+def timed(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_times[name] = startup_times.get(name, 0) + time.perf_counter() - start
+
+
+# 导入模块，首次导入时记录耗时
+def load(name):
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with timed(name):
+        return importlib.import_module(name)
+
+
+# 获取 matplotlib.pyplot，并设置中文字体支持
+def pyplot():
+    global _pyplot_ready
+    plt = load("matplotlib.pyplot")
+    if not _pyplot_ready:
+        matplotlib = load("matplotlib")
+        matplotlib.rcParams['font.sans-serif'] = ['SimHei']  # 用来正常显示中文标签
+        matplotlib.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
+        _pyplot_ready = True
+    return plt
+
+
+# 打印启动耗时明细
+def report():
+    if not startup_times:
+        return
+    total = sum(startup_times.values())
+    parts = "，".join(f"{name} {cost:.2f}s"
+                     for name, cost in sorted(startup_times.items(), key=lambda x: -x[1]))
+    print(f"启动耗时 {total:.2f}s: {parts}")
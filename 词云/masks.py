@@ -0,0 +1,111 @@
+import hashlib
+import os
+import re
+
+import lazyload
+
+# 背景轮廓图（蒙版）的查找与缓存
+#
+# AssetIndex 在启动时扫描一次图片文件夹，把各种规范化后的名字映射到图片路径，
+# 每个文本文件查找背景图都是一次字典查找。
+# load_mask 把解码后的 PNG 保存为 .npy，之后用 np.load(mmap_mode='r') 直接映射，
+# 重复运行和并行渲染的各个进程不再重新解码 PNG，并共享同一份页缓存。
+# 缓存文件名包含 PNG 的修改时间和大小，PNG 变了就会重新生成。
+
+MASK_CACHE_DIR = "蒙版缓存"
+
+
+# 提取区名的函数 - 只保留"XX区"或"XX新区"部分
+def extract_district_name(filename):
+    # 尝试匹配"XX区"或"XX新区"格式
+    match = re.search(r'([^\s]+[区]|[^\s]+新区)', filename)
+    if match:
+        return match.group(0)
+    return os.path.splitext(filename)[0].strip()  # 如果没有匹配到，返回无扩展名的文件名
+
+
+# 不区分大小写、去除空格
+def normalize_name(name):
+    return name.lower().replace(" ", "")
+
+
+class AssetIndex:
+    """区名 → 背景图路径 的索引，只在创建时扫描一次图片文件夹"""
+
+    def __init__(self, images_folder):
+        self.images_folder = images_folder
+        self.files = set()
+        self.by_name = {}
+        self.by_normalized = {}
+        if not os.path.exists(images_folder):
+            return
+        for png in os.listdir(images_folder):
+            if not png.lower().endswith('.png'):
+                continue
+            path = os.path.join(images_folder, png)
+            self.files.add(png)
+            # 原始名称和提取的区名都可以匹配
+            for name in (os.path.splitext(png)[0].strip(), extract_district_name(png)):
+                self.by_name[name.lower()] = path
+        for name, path in self.by_name.items():
+            self.by_normalized.setdefault(normalize_name(name), path)
+
+    def __bool__(self):
+        return bool(self.files)
+
+    # 按文本文件名查找对应的背景图，找不到时返回 None
+    def find(self, text_file):
+        file_base = os.path.splitext(text_file)[0].strip()
+        district_name = extract_district_name(text_file)
+
+        # 1. 直接匹配
+        if f"{file_base}.png" in self.files:
+            return os.path.join(self.images_folder, f"{file_base}.png")
+        # 2. 使用区名匹配
+        path = self.by_name.get(district_name.lower())
+        if path is not None:
+            return path
+        # 3. 不区分大小写、去除空格的匹配
+        return self.by_normalized.get(normalize_name(file_base))
+
+
+# 蒙版缓存文件的路径（包含图片路径、修改时间和大小）
+def mask_cache_path(png_path):
+    st = os.stat(png_path)
+    name = hashlib.sha1(os.path.abspath(png_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(MASK_CACHE_DIR, f"{name}-{st.st_mtime_ns}-{st.st_size}.npy"), name
+
+
+# 读取背景图为数组：优先映射缓存的 .npy，没有或已过期时解码 PNG 并写入缓存
+def load_mask(png_path):
+    np = lazyload.load("numpy")
+    cache_path, prefix = mask_cache_path(png_path)
+    try:
+        return np.load(cache_path, mmap_mode='r')
+    except (FileNotFoundError, ValueError, OSError):
+        pass
+
+    Image = lazyload.load("PIL.Image")
+    mask = np.array(Image.open(png_path))
+    os.makedirs(MASK_CACHE_DIR, exist_ok=True)
+    tmp = f"{cache_path}.{os.getpid()}.tmp.npy"
+    np.save(tmp, mask)
+    os.replace(tmp, cache_path)
+    # 删除同一张图片的旧缓存
+    for name in os.listdir(MASK_CACHE_DIR):
+        old = os.path.join(MASK_CACHE_DIR, name)
+        if name.startswith(f"{prefix}-") and name.endswith(".npy") and old != cache_path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return np.load(cache_path, mmap_mode='r')
+
+
+# 按比例缩小背景图（最近邻采样，不引入新的像素值；用于预览）
+def scale_mask(mask, scale):
+    np = lazyload.load("numpy")
+    Image = lazyload.load("PIL.Image")
+    height, width = mask.shape[:2]
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return np.asarray(Image.fromarray(np.asarray(mask)).resize(size, Image.NEAREST))
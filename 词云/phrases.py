@@ -0,0 +1,113 @@
+import hashlib
+import math
+
+import lazyload
+from segment import init_jieba, iter_text_chunks, normalize_text
+from wordcount import TOKENS
+
+# 短语（搭配）挖掘
+#
+# jieba 常把政策术语切成几个词（如"未来 产业"、"高质量 发展"），只统计单个词
+# 会漏掉这些短语。这里把分词结果转换为词ID数组，相邻的两个/三个词ID按位拼成
+# 一个 int64 整数，用 np.unique 统计次数，不生成 Python 元组。
+# 组成短语的每个词都必须通过过滤规则（停用词、标点、长度），中间隔着停用词或
+# 标点的不算相邻。按 PMI（点互信息）或只按次数筛选：
+#   PMI(a b)   = log(N · c(ab) / (c(a) · c(b)))
+#   PMI(a b c) = log(N² · c(abc) / (c(a) · c(b) · c(c)))
+# 选出的短语（各词直接拼接）并入交给 WordCloud.fit_words 的词频字典。
+
+MIN_COUNT = 5           # 短语至少出现的次数
+MIN_PMI = 3.0           # PMI 下限（method='pmi' 时）
+MAX_N = 3               # 最长几个词组成的短语
+MAX_PHRASE_LEN = 8      # 短语最多几个字
+PHRASE_VERSION = 1      # 挖掘规则有变化时加一，使缓存失效
+
+
+# 读取文件并分词，返回词ID数组（按段落分块，块边界都是标点或换行，不影响相邻关系）
+def file_token_ids(path, index=TOKENS):
+    np = lazyload.load("numpy")
+    init_jieba()
+    cut = lazyload.load("jieba").lcut
+    parts = [index.encode(cut(normalize_text(chunk))) for chunk in iter_text_chunks(path)]
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.int32)
+
+
+# 在词ID数组上挖掘短语，返回 {短语: 次数}（按次数从多到少）
+def mine_phrases(ids, token_filter, index=TOKENS, method='pmi', min_count=MIN_COUNT,
+                 min_pmi=MIN_PMI, max_n=MAX_N):
+    np = lazyload.load("numpy")
+    n_tokens = len(ids)
+    vocab = len(index)
+    bits = max(1, (vocab - 1).bit_length())
+    if bits * max_n > 63:
+        max_n = 63 // bits  # 词表太大时放不下三个ID
+    unigram = np.bincount(ids, minlength=vocab).astype(np.float64)
+    content = token_filter.keep_flags(index)[ids]
+    ids64 = ids.astype(np.int64)
+    lengths = index.lengths()
+    words = index.words
+    mask = (1 << bits) - 1
+
+    phrases = {}
+    for n in range(2, max_n + 1):
+        if n_tokens < n:
+            break
+        m = n_tokens - n + 1
+        # 连续 n 个都是有效词的位置
+        valid = content[:m].copy()
+        for j in range(1, n):
+            valid &= content[j:j + m]
+        keys = ids64[:m][valid]
+        for j in range(1, n):
+            keys = (keys << bits) | ids64[j:j + m][valid]
+        if len(keys) == 0:
+            continue
+        uniq, counts = np.unique(keys, return_counts=True)
+        frequent = counts >= min_count
+        uniq, counts = uniq[frequent], counts[frequent]
+        # 拆回各位置的词ID
+        parts = [(uniq >> (bits * (n - 1 - j))) & mask for j in range(n)]
+        keep = sum(lengths[p] for p in parts) <= MAX_PHRASE_LEN
+        if method == 'pmi':
+            pmi = np.log(counts.astype(np.float64)) + (n - 1) * math.log(n_tokens)
+            for p in parts:
+                pmi -= np.log(unigram[p])
+            keep &= pmi >= min_pmi
+        for i in np.flatnonzero(keep).tolist():
+            phrase = "".join(words[p[i]] for p in parts)
+            phrases[phrase] = phrases.get(phrase, 0) + int(counts[i])
+    return dict(sorted(phrases.items(), key=lambda x: x[1], reverse=True))
+
+
+# 缓存键的附加部分：挖掘参数和过滤规则
+def phrase_variant(token_filter, method, min_count, min_pmi, max_n):
+    h = hashlib.sha256()
+    h.update(f"{PHRASE_VERSION}|{method}|{min_count}|{min_pmi}|{max_n}|{MAX_PHRASE_LEN}|"
+             f"{token_filter.min_len}|{token_filter.max_len}|".encode("utf-8"))
+    h.update("\n".join(sorted(token_filter.stopwords)).encode("utf-8"))
+    return h.hexdigest()
+
+
+# 挖掘一个文件的短语；cache 为 segcache.SegmentCache 时结果按文件内容和参数缓存
+def file_phrases(path, token_filter, cache=None, method='pmi', min_count=MIN_COUNT,
+                 min_pmi=MIN_PMI, max_n=MAX_N):
+    key = None
+    if cache is not None:
+        variant = phrase_variant(token_filter, method, min_count, min_pmi, max_n)
+        key = cache.key_for(path, variant)
+        phrases = cache.get(key)
+        if phrases is not None:
+            return dict(phrases)
+    phrases = mine_phrases(file_token_ids(path), token_filter, method=method,
+                           min_count=min_count, min_pmi=min_pmi, max_n=max_n)
+    if cache is not None:
+        cache.put(key, phrases)
+    return phrases
+
+
+# 把短语并入词频字典（按同样的规则加权），返回新的字典
+def merge_phrases(word_dict, phrases, token_filter):
+    merged = dict(word_dict)
+    for phrase, count in phrases.items():
+        merged[phrase] = merged.get(phrase, 0) + token_filter.weigh(phrase, count)
+    return merged
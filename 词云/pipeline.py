@@ -0,0 +1,274 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+from collections import Counter
+
+import fetch
+import lazyload
+import segcache
+from dedup import dedup_files, dedup_params
+from groups import district_groups, create_group_visualization
+from layout import LAYOUT_DIR
+from masks import AssetIndex, extract_district_name
+from phrases import PHRASE_VERSION, file_phrases, merge_phrases
+from profiling import profiler
+from render import render_clouds, DISTRICT_STYLE, PLAIN_STYLE
+from segment import count_files
+from stagegraph import StageGraph, StageError
+from tables import TABLE_BACKENDS, write_frequency_table
+from termmatrix import WEIGHTINGS, make_ranker
+from wordcount import cloud_words
+from wordfilter import TokenFilter, STOP_FILE, CITY_STOP_DIR
+
+# 统一的流水线入口
+#
+#   fetch   按 Excel 中的关键词抓取搜索结果正文，写入 xxx/<工作表名>.txt
+#   count   对语料文件夹中的每个文本分词，原始词频保存到 流水线/词频/
+#   tables  各区 Top50 词频总表
+#   clouds  各区词云图（有背景轮廓图时使用彩色样式，否则黑底白字）
+#   groups  十六区分组展示图
+#   all     count、tables、clouds、groups
+# --weighting tfidf / logodds 时，tables、clouds、groups 按跨城市区分度排序和加权（见 termmatrix）。
+# --phrases 时 clouds 把多词短语并入词云图（见 phrases，只在按词频时生效）。
+# --dedup 时 count 先删除重复的段落（见 dedup），统计 去重语料/ 中去重后的文件。
+# clouds 复用布局缓存中的词云图布局，--relayout 时词频略有变化也只重新放置变化的词（见 layout）。
+#
+# 各阶段组成阶段图（见 stagegraph），输入没变化的阶段直接跳过：
+#   python pipeline.py all --jobs 4
+#   python pipeline.py clouds --force       重新生成词云图（count 仍按需执行）
+#   python pipeline.py groups --only        只重新拼分组图
+# fetch 需要联网，不包含在 all 中，也不是 count 的上游；抓取完成后运行 count 即可。
+
+COUNTS_DIR = os.path.join("流水线", "词频")
+
+STAGES = ["fetch", "count", "tables", "clouds", "groups"]
+
+
+# 语料文件夹中的文本文件
+def corpus_files(docs_folder):
+    return sorted(glob.glob(os.path.join(docs_folder, "*.txt")))
+
+
+# 影响过滤结果的停用词文件
+def filter_files():
+    return [STOP_FILE] + sorted(glob.glob(os.path.join(CITY_STOP_DIR, "*.txt")))
+
+
+def counts_path(text_path):
+    name = os.path.splitext(os.path.basename(text_path))[0]
+    return os.path.join(COUNTS_DIR, f"{name}.json.gz")
+
+
+# 保存原始词频（gzip 不写时间戳，内容不变时文件也不变，下游阶段不会误判为有变化）
+def write_counts(path, text_file, counts):
+    data = json.dumps({'file': text_file, 'counts': list(counts.items())}, ensure_ascii=False)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(gzip.compress(data.encode("utf-8"), mtime=0))
+    os.replace(tmp, path)
+
+
+# 读取原始词频，返回 (文本文件名, Counter)
+def read_counts(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    return data['file'], Counter(dict(data['counts']))
+
+
+# 读取 count 阶段的全部结果，返回 {文本文件名: Counter}
+def load_all_counts(graph):
+    return dict(read_counts(path) for path in graph.state['count']['outputs'])
+
+
+# 关键词 Excel 文件，未指定时使用 搜索.py 中的配置
+def excel_path(args):
+    import 搜索  # openpyxl、aiohttp 只在抓取时需要
+    return args.excel or 搜索.EXCEL_PATH
+
+
+def run_fetch(args):
+    import 搜索
+    path = excel_path(args)
+    wb = lazyload.load("openpyxl").load_workbook(path, read_only=True)
+    total = len(wb.sheetnames)
+    wb.close()
+    搜索.process_excel(headless=True, search_url=args.search_url, concurrency=args.jobs,
+                     excel_path=path, sheet_range=(0, total - 1))
+    return corpus_files(fetch.OUTPUT_DIR)
+
+
+# 实际统计的文件：{原文件: 去重后的文件}（不去重时为原文件本身）
+def corpus_sources(args, paths):
+    if not args.dedup:
+        return {path: path for path in paths}
+    return dedup_files(paths, near=(args.dedup == 'near'))
+
+
+def run_count(args):
+    paths = corpus_files(args.docs)
+    if not paths:
+        raise StageError(f"在 '{args.docs}' 中没有找到文本文件")
+    cache = segcache.SegmentCache()
+    sources = corpus_sources(args, paths)
+    counted = count_files(list(sources.values()), workers=args.jobs, stream=args.stream, cache=cache)
+    raw_counts = {path: counted[sources[path]] for path in paths}
+    print(f"分词缓存: 命中 {cache.hits} 个文件，重新分词 {cache.misses} 个文件")
+
+    os.makedirs(COUNTS_DIR, exist_ok=True)
+    outputs = []
+    for path in paths:
+        output_file = counts_path(path)
+        write_counts(output_file, os.path.basename(path), raw_counts[path])
+        outputs.append(output_file)
+    # 删除已不在语料中的文件的结果
+    for old in glob.glob(os.path.join(COUNTS_DIR, "*.json.gz")):
+        if old not in outputs:
+            os.remove(old)
+    return outputs
+
+
+def run_tables(graph, args):
+    os.makedirs(args.output, exist_ok=True)
+    token_filter = TokenFilter()
+    docs = load_all_counts(graph)
+    rank = make_ranker(docs, args.weighting, token_filter=token_filter)
+    outputs = []
+    for text_file in docs:
+        district_name = extract_district_name(text_file)
+        _, top50, total = rank(text_file, token_filter.for_city(district_name), 50)
+        top50_data = [(word, freq, f"{freq/total*100:.2f}%") for word, freq in top50]
+        for output_file in write_frequency_table(district_name, top50_data, args.output,
+                                                 args.tables.split(",")):
+            print(f"  已保存完整词频表: {output_file}")
+            outputs.append(output_file)
+    return outputs
+
+
+def run_clouds(graph, args):
+    assets = AssetIndex(args.images)
+    weighted = TokenFilter(weighted=True)
+    plain = TokenFilter()
+    docs = load_all_counts(graph)
+    rank = make_ranker(docs, args.weighting, token_filter=plain)
+    phrases = args.phrases and args.weighting == 'freq'
+    if args.phrases and not phrases:
+        print("提示: --phrases 只在 --weighting freq 时生效，已忽略")
+    cache = segcache.SegmentCache() if phrases else None
+    jobs = []
+    for text_file in docs:
+        district_name = extract_district_name(text_file)
+        output_file = os.path.join(args.output, f"{district_name}_词云图.png")
+        png_file = assets.find(text_file)
+        style = DISTRICT_STYLE if png_file is not None else PLAIN_STYLE
+        city_filter = (weighted if png_file is not None else plain).for_city(district_name)
+        words, _, _ = rank(text_file, city_filter, 0)
+        words = cloud_words(words, style['options']['max_words'])
+        if phrases:
+            text_path = os.path.join(args.docs, text_file)
+            text_path = corpus_sources(args, [text_path])[text_path]
+            words = merge_phrases(words, file_phrases(text_path, city_filter, cache), city_filter)
+        job = dict(style, words=words, output_file=output_file,
+                   layout_cache=LAYOUT_DIR, relayout=args.relayout)
+        if png_file is not None:
+            job['mask'] = png_file
+        jobs.append(job)
+    print(f"正在生成 {len(jobs)} 个词云图...")
+    return render_clouds(jobs, args.jobs)
+
+
+def run_groups(graph, args):
+    token_filter = TokenFilter(weighted=True)
+    wanted = {d for group in district_groups for d in group}
+    docs = load_all_counts(graph)
+    rank = make_ranker(docs, args.weighting, token_filter=token_filter)
+    districts_data = {}
+    for text_file in docs:
+        district_name = extract_district_name(text_file)
+        if district_name in wanted:
+            _, top10, _ = rank(text_file, token_filter.for_city(district_name), 10)
+            districts_data[district_name] = {'top_words': top10}
+    outputs = []
+    for i in range(len(district_groups)):
+        output_file = create_group_visualization(i, districts_data, args.output)
+        if output_file is not None:
+            outputs.append(output_file)
+    return outputs
+
+
+# 按命令行参数建立阶段图
+def build_graph(args):
+    graph = StageGraph()
+    graph.add("fetch", lambda: run_fetch(args),
+              inputs=lambda: [excel_path(args)],
+              params=lambda: {'search_url': args.search_url})
+    graph.add("count", lambda: run_count(args),
+              inputs=lambda: corpus_files(args.docs),
+              params=lambda: {'segment': segcache.env_digest(),
+                              'dedup': dedup_params(args.dedup == 'near') if args.dedup else None})
+    graph.add("tables", lambda: run_tables(graph, args), deps=["count"],
+              inputs=filter_files,
+              params=lambda: {'formats': args.tables, 'output': args.output,
+                              'weighting': args.weighting})
+    graph.add("clouds", lambda: run_clouds(graph, args), deps=["count"],
+              inputs=lambda: filter_files() + sorted(AssetIndex(args.images).by_name.values()),
+              params=lambda: {'styles': [DISTRICT_STYLE, PLAIN_STYLE], 'output': args.output,
+                              'weighting': args.weighting,
+                              'phrases': PHRASE_VERSION if args.phrases else None,
+                              'dedup': args.dedup if args.phrases else None,
+                              'relayout': args.relayout})
+    graph.add("groups", lambda: run_groups(graph, args), deps=["count", "clouds"],
+              inputs=filter_files,
+              params=lambda: {'groups': district_groups, 'output': args.output,
+                              'weighting': args.weighting})
+    return graph
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--jobs", type=int, default=1, help="各阶段并行的进程数/请求数（默认1）")
+    common.add_argument("--only", action="store_true", help="只执行指定阶段，不执行上游阶段")
+    common.add_argument("--force", action="store_true", help="即使输入没有变化也重新执行")
+    common.add_argument("--docs", default=fetch.OUTPUT_DIR, help="语料文件夹（默认 xxx）")
+    common.add_argument("--images", default="地区抠图", help="背景轮廓图文件夹")
+    common.add_argument("--output", default="词频与词云图", help="输出文件夹")
+    common.add_argument("--tables", default="png",
+                        help=f"词频总表输出格式，逗号分隔，可选 {','.join(TABLE_BACKENDS)}（默认 png）")
+    common.add_argument("--stream", action="store_true", help="按段落流式分词，适合超大语料")
+    common.add_argument("--weighting", choices=WEIGHTINGS, default="freq",
+                        help="排序与词云权重：freq 词频（默认），tfidf / logodds 跨城市区分度")
+    common.add_argument("--relayout", action="store_true",
+                        help="clouds 阶段词频略有变化时只重新放置变化的词（见 layout）")
+    common.add_argument("--phrases", action="store_true", help="clouds 阶段把多词短语并入词云图")
+    common.add_argument("--dedup", choices=("exact", "near"), nargs="?", const="near",
+                        help="count 前删除重复的段落：exact 只删完全重复，near 同时删近似重复（默认）")
+    common.add_argument("--excel", help="关键词 Excel 文件（默认见 搜索.py）")
+    common.add_argument("--search-url", default=fetch.SEARCH_URL, help="搜索地址模板")
+    common.add_argument("--profile", nargs="?", const=os.path.join("性能报告", "流水线.json"),
+                        help="记录各阶段的耗时和内存，写出报告（默认 性能报告/流水线.json）")
+    common.add_argument("--cprofile", action="store_true", help="配合 --profile，保存最耗时阶段的 cProfile 数据")
+
+    parser = argparse.ArgumentParser(description="词频统计与词云图流水线")
+    sub = parser.add_subparsers(dest="stage", required=True)
+    for name in STAGES + ["all"]:
+        sub.add_parser(name, parents=[common])
+    args = parser.parse_args()
+
+    targets = ["count", "tables", "clouds", "groups"] if args.stage == "all" else [args.stage]
+    if args.profile:
+        profiler.enable(args.cprofile)
+    graph = build_graph(args)
+    try:
+        executed = graph.run(targets, only=args.only, force=args.force)
+    except StageError as e:
+        print(f"错误: {e}")
+        return
+    if not executed:
+        print("所有阶段都是最新的")
+    lazyload.report()
+    profiler.finish(args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+# 分阶段的耗时与内存统计（--profile）
+#
+# 用法：
+#   from profiling import profiler
+#   with profiler.stage("分词", city):
+#       ...
+# 未启用时 stage() 直接返回一个空的上下文管理器，几乎没有开销。
+# 启用后每个阶段记录墙钟时间、CPU 时间和 tracemalloc 峰值（该阶段内新分配
+# 的 Python 对象内存峰值），结束时写出 JSON 报告和可读的汇总。
+# tracemalloc 本身会让程序变慢，启用时的绝对耗时偏大，各阶段之间的比例仍可参考。
+# cprofile=True 时每类阶段各用一个 cProfile 统计，最后只保存总耗时最多的那一类。
+# 阶段不要嵌套（tracemalloc 峰值和 cProfile 都按平铺的阶段统计）；
+# 在进程池中执行的工作不计入（只统计当前进程）。
+
+_NULL = nullcontext()
+
+
+class Profiler:
+    """按阶段、按城市记录耗时与内存"""
+
+    def __init__(self):
+        self.enabled = False
+        self.cprofile = False
+        self.records = []
+        self._profiles = {}
+        self._start = None
+
+    def enable(self, cprofile=False):
+        import tracemalloc
+        self.enabled = True
+        self.cprofile = cprofile
+        self._start = time.perf_counter()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stage(self, name, city=None):
+        if not self.enabled:
+            return _NULL
+        return self._measure(name, city)
+
+    @contextmanager
+    def _measure(self, name, city):
+        import tracemalloc
+        profile = None
+        if self.cprofile:
+            import cProfile
+            profile = self._profiles.setdefault(name, cProfile.Profile())
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            peak = tracemalloc.get_traced_memory()[1] - base
+            self.records.append({'stage': name, 'city': city, 'wall': round(wall, 4),
+                                 'cpu': round(cpu, 4), 'peak_mem': max(peak, 0)})
+
+    # 按阶段汇总：[(阶段, 次数, 墙钟, CPU, 最大内存峰值)]，按墙钟时间从大到小
+    def totals(self):
+        totals = {}
+        for r in self.records:
+            t = totals.setdefault(r['stage'], [0, 0.0, 0.0, 0])
+            t[0] += 1
+            t[1] += r['wall']
+            t[2] += r['cpu']
+            t[3] = max(t[3], r['peak_mem'])
+        return sorted(((name, *t) for name, t in totals.items()), key=lambda x: -x[2])
+
+    def summary(self):
+        total = time.perf_counter() - self._start if self._start else 0
+        lines = [f"总耗时 {total:.2f}s",
+                 f"{'阶段':<14}{'次数':>6}{'墙钟':>10}{'CPU':>10}{'内存峰值':>12}{'占比':>8}"]
+        for name, count, wall, cpu, peak in self.totals():
+            share = wall / total * 100 if total else 0
+            lines.append(f"{name:<14}{count:>6}{wall:>9.2f}s{cpu:>9.2f}s"
+                         f"{peak / (1 << 20):>10.1f}MB{share:>7.1f}%")
+        # 每个阶段最慢的城市
+        slowest = {}
+        for r in self.records:
+            if r['city'] is not None and r['wall'] > slowest.get(r['stage'], {}).get('wall', -1):
+                slowest[r['stage']] = r
+        if slowest:
+            lines.append("各阶段最慢的城市:")
+            for name, r in slowest.items():
+                lines.append(f"  {name}: {r['city']} {r['wall']:.2f}s")
+        return "\n".join(lines)
+
+    # 写出 JSON 报告和汇总（<path>.txt），cProfile 数据写入 <path>.prof，返回输出文件列表
+    def write_report(self, path):
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        totals = self.totals()
+        report = {
+            'time': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'total_wall': round(time.perf_counter() - self._start, 4) if self._start else None,
+            'stages': [{'stage': name, 'count': count, 'wall': round(wall, 4),
+                        'cpu': round(cpu, 4), 'peak_mem': peak}
+                       for name, count, wall, cpu, peak in totals],
+            'records': self.records,
+        }
+        base = os.path.splitext(path)[0]
+        outputs = [path, f"{base}.txt"]
+        if self.cprofile and totals:
+            hottest = totals[0][0]
+            self._profiles[hottest].dump_stats(f"{base}.prof")
+            report['cprofile'] = {'stage': hottest, 'file': f"{base}.prof"}
+            outputs.append(f"{base}.prof")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        with open(f"{base}.txt", 'w', encoding='utf-8') as f:
+            f.write(self.summary() + "\n")
+        return outputs
+
+    # 打印汇总并写出报告
+    def finish(self, path):
+        if not self.enabled:
+            return
+        print(self.summary())
+        outputs = self.write_report(path)
+        print(f"性能报告已保存: {', '.join(outputs)}")
+
+
+profiler = Profiler()
@@ -0,0 +1,168 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import lazyload
+from layout import fit_cached
+from masks import load_mask, scale_mask
+
+# 词云图渲染
+#
+# 每张词云图用一个纯数据的任务描述（dict），可以直接传给渲染进程：
+#   {
+#     'words': {词: 权重},
+#     'output_file': 输出路径,
+#     'mask': 背景轮廓图路径（可选）,
+#     'colors': ['#871A84', ...]  配色（可选，生成 ListedColormap）,
+#     'color': 'white'  统一文字颜色（可选）,
+#     'options': {...}  其余 WordCloud 参数（font_path、max_words 等）,
+#     'figure': {'figsize': (10, 8), 'dpi': 300}  用 matplotlib 保存（可选）,
+#     'layout_cache': '布局缓存'  布局缓存文件夹（可选，见 layout）,
+#     'relayout': True  词频略有变化时增量重排（可选，需要 layout_cache）,
+#     'mask_scale': 0.25  背景图缩小的比例（可选，预览用，见 preview_job）,
+#   }
+# options 中固定 random_state，串行与并行渲染得到完全相同的图片。
+# 背景图通过 masks.load_mask 以内存映射方式读取，各渲染进程共享同一份数据。
+
+# 默认随机种子，保证同样的词频每次得到同样的布局
+RANDOM_SEED = 42
+
+# 各区词云图的样式（带背景轮廓图，使用彩色系的颜色映射）
+DISTRICT_STYLE = {
+    'options': {
+        'font_path': 'simhei.ttf',
+        'prefer_horizontal': 0.9,
+        'background_color': 'white',
+        'max_words': 100,
+        'max_font_size': 300,
+        'collocations': False,
+    },
+    'colors': ['#d53e4f', '#f46d43', '#fdae61', '#fee08b', '#e6f598', '#abdda4', '#66c2a5', '#3288bd'],
+}
+
+# 无背景图的词云图样式（黑色背景、白色文字，经 matplotlib 以 300 dpi 保存）
+PLAIN_STYLE = {
+    'options': {
+        'font_path': 'simhei.ttf',
+        'width': 800,
+        'height': 600,
+        'background_color': 'black',
+        'max_words': 100,
+        'max_font_size': 300,
+        'prefer_horizontal': 0.9,
+        'collocations': False,
+    },
+    'color': 'white',
+    'figure': {'figsize': (10, 8), 'dpi': 300},
+}
+
+# 预览的缩小比例和输出子文件夹
+PREVIEW_SCALE = 0.25
+PREVIEW_DIR = "预览"
+
+
+# 由正式的渲染任务得到预览任务：同样的词和样式，画布、背景图和字号按 scale 缩小，
+# 不经 matplotlib、直接保存为小图，写入输出文件夹下的 预览/，不使用布局缓存
+def preview_job(job, scale=PREVIEW_SCALE):
+    options = dict(job.get('options', {}))
+    for key in ('width', 'height', 'max_font_size'):
+        if options.get(key):
+            options[key] = max(1, round(options[key] * scale))
+    if job.get('mask') is None:
+        # 没有背景图时画布使用 WordCloud 的默认大小
+        options.setdefault('width', max(1, round(400 * scale)))
+        options.setdefault('height', max(1, round(200 * scale)))
+    options['min_font_size'] = max(1, round(options.get('min_font_size', 4) * scale))
+    out_dir, name = os.path.split(job['output_file'])
+    preview = dict(job, options=options, output_file=os.path.join(out_dir, PREVIEW_DIR, name),
+                   layout_cache=None, relayout=False)
+    preview.pop('figure', None)
+    if job.get('mask'):
+        preview['mask_scale'] = scale
+    return preview
+
+
+# 根据任务描述生成 WordCloud 对象（只做布局，不保存）
+def build_cloud(job):
+    WordCloud = lazyload.load("wordcloud").WordCloud
+    options = dict(job.get('options', {}))
+    options.setdefault('random_state', RANDOM_SEED)
+    if job.get('mask'):
+        options['mask'] = load_mask(job['mask'])
+        if job.get('mask_scale', 1) != 1:
+            options['mask'] = scale_mask(options['mask'], job['mask_scale'])
+    if job.get('colors'):
+        colors = lazyload.load("matplotlib.colors")
+        options['colormap'] = colors.ListedColormap(job['colors'])
+    if job.get('color'):
+        color = job['color']
+        options['color_func'] = lambda *args, **kwargs: color
+    wordcloud = WordCloud(**options)
+    if job.get('layout_cache'):
+        return fit_cached(wordcloud, job, job['layout_cache'], job.get('relayout', False))
+    return wordcloud.fit_words(job['words'])
+
+
+# 保存词云图：直接保存，或者按 figure 设置经 matplotlib 保存
+def save_cloud(wordcloud, job):
+    output_file = job['output_file']
+    figure = job.get('figure')
+    if figure is None:
+        wordcloud.to_file(output_file)
+        return output_file
+    plt = lazyload.pyplot()
+    plt.figure(figsize=figure.get('figsize', (10, 8)))
+    plt.imshow(wordcloud, interpolation="bilinear")
+    plt.axis("off")
+    plt.savefig(output_file, dpi=figure.get('dpi', 300), bbox_inches='tight')
+    plt.close()
+    return output_file
+
+
+# 渲染一张词云图（也是渲染进程中执行的任务）
+def render_cloud(job):
+    wordcloud = build_cloud(job)
+    return save_cloud(wordcloud, job)
+
+
+# 渲染一张词云图，返回 (输出文件, 图像数组)；output_file 为空时只返回数组、不保存
+def render_cloud_array(job):
+    np = lazyload.load("numpy")
+    wordcloud = build_cloud(job)
+    image = wordcloud.to_image()
+    output_file = job.get('output_file')
+    if output_file:
+        if job.get('figure') is None:
+            image.save(output_file, optimize=True)  # 与 WordCloud.to_file 相同，不再重新绘制
+        else:
+            save_cloud(wordcloud, job)
+    return output_file, np.asarray(image)
+
+
+# 渲染一批词云图，workers > 1 时使用进程池并行渲染，返回结果列表（顺序与 jobs 一致）
+# arrays=False 时结果为输出文件，arrays=True 时为 (输出文件, 图像数组)（见 render_cloud_array）
+def render_clouds(jobs, workers=1, arrays=False):
+    for job in jobs:
+        out_dir = os.path.dirname(job.get('output_file') or "")
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+    if workers > 1:
+        # 先在主进程中准备好蒙版缓存，渲染进程直接映射
+        for mask in {job['mask'] for job in jobs if job.get('mask')}:
+            load_mask(mask)
+    render = render_cloud_array if arrays else render_cloud
+    if workers <= 1 or len(jobs) <= 1:
+        results = map(render, jobs)
+        return report_outputs(results, arrays)
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return report_outputs(pool.map(render, jobs), arrays)
+
+
+# 逐个取出渲染结果并打印保存的文件
+def report_outputs(results, arrays):
+    outputs = []
+    for result in results:
+        outputs.append(result)
+        output_file = result[0] if arrays else result
+        if output_file:
+            print(f"  已保存词云图: {output_file}")
+    return outputs
@@ -0,0 +1,112 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+
+# 搜索结果页缓存
+#
+# 以「规范化的关键词 + 搜索地址模板」的哈希为键，把抓到的 HTML 压缩保存到磁盘。
+# 在有效期（TTL）内重复或中断后重新运行时直接读取缓存，不再请求远端。
+# 抓取时间保存在条目中用于判断过期；文件 mtime 作为最近使用时间，
+# 缓存总大小超过上限时按 mtime 淘汰最旧的条目；写入时不扫描目录，
+# 由调用方在一批抓取结束后调用一次 evict（见 fetch.fetch_keywords）。
+
+CACHE_DIR = "搜索缓存"
+CACHE_TTL = 7 * 24 * 3600              # 有效期（秒）
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+# 去掉首尾空白并合并中间的连续空白
+def normalize_keyword(keyword):
+    return " ".join(str(keyword).split())
+
+
+class ResponseCache:
+    """按关键词和搜索地址缓存结果页，带有效期，容量受限，LRU 淘汰"""
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl=CACHE_TTL, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    # 计算缓存键
+    def key_for(self, keyword, search_url):
+        h = hashlib.sha256()
+        h.update(search_url.encode("utf-8"))
+        h.update(b"\0")
+        h.update(normalize_keyword(keyword).encode("utf-8"))
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    # 读取缓存，未命中或已过期返回 None；命中时刷新 mtime 作为最近使用时间
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, OSError, ValueError):
+            self.misses += 1
+            return None
+        if self.ttl is not None and time.time() - entry.get("fetched", 0) > self.ttl:
+            self.expired += 1
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return entry["html"]
+
+    # 写入缓存
+    def put(self, key, url, html):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump({"url": url, "fetched": time.time(), "html": html}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    # 总大小超过上限时删除最久未使用的条目
+    def evict(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json.gz"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    # 清空缓存
+    def clear(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json.gz"):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    # 命中统计
+    def summary(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0
+        return (f"搜索缓存: 命中 {self.hits} 次，未命中 {self.misses} 次"
+                f"（其中过期 {self.expired} 次），命中率 {rate:.1f}%")
@@ -0,0 +1,139 @@
+import gzip
+import hashlib
+import json
+import os
+from collections import Counter
+
+import segment
+
+# 分词结果缓存
+#
+# 以「文件内容 + jieba 版本 + 自定义词典 + 分词流程版本」的哈希为键，
+# 把每个文件的原始词频（过滤之前）保存到磁盘。只改了 stop.txt、长度规则
+# 或绘图参数时，直接从缓存读取词频，不再重新分词。
+# 缓存总大小超过上限时按最近使用时间（文件 mtime）淘汰最旧的条目。
+# 总大小只在第一次写入时扫描一遍目录，之后随写入累加；超过上限才扫描淘汰，
+# 一次删到上限的 EVICT_TO 以下，不会每写一条就列出、stat 整个目录。
+
+CACHE_DIR = "分词缓存"
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+# 淘汰时删到上限的多少比例以下
+EVICT_TO = 0.9
+
+# 分词流程有变化（会影响原始词频）时加一，使旧缓存全部失效
+SEGMENT_VERSION = 4
+
+_READ_SIZE = 1 << 20
+
+
+# 计算文件内容的哈希（分块读取，不占用大量内存）
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+_env = None
+
+
+# 与文件内容无关、但会影响分词结果的部分：流程版本、jieba 版本、自定义词典
+def env_digest():
+    global _env
+    if _env is None:
+        h = hashlib.sha256()
+        h.update(f"{SEGMENT_VERSION}|{segment.jieba_version()}|".encode("utf-8"))
+        if os.path.isfile(segment.USER_DICT):
+            h.update(file_digest(segment.USER_DICT).encode("ascii"))
+        _env = h.hexdigest()
+    return _env
+
+
+class SegmentCache:
+    """按内容寻址的分词结果缓存，容量受限，LRU 淘汰"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._total = None  # 缓存目录的总大小（第一次写入时扫描）
+
+    # 计算某个文本文件的缓存键；variant 区分同一文件的其他缓存内容（如短语挖掘结果）
+    def key_for(self, path, variant=""):
+        h = hashlib.sha256()
+        h.update(env_digest().encode("ascii"))
+        h.update(file_digest(path).encode("ascii"))
+        if variant:
+            h.update(f"|{variant}".encode("utf-8"))
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    # 读取缓存，未命中返回 None；命中时刷新 mtime 作为最近使用时间
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                items = json.load(f)
+        except (FileNotFoundError, OSError, ValueError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return Counter(dict(items))
+
+    # 写入缓存（保存为有序的 [词, 次数] 列表，保持词的首次出现顺序）
+    def put(self, key, counts):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(list(counts.items()), f, ensure_ascii=False)
+        if self._total is not None:
+            size = os.path.getsize(tmp)
+            try:
+                size -= os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+            self._total += size
+        os.replace(tmp, path)
+        if self._total is None or self._total > self.max_bytes:
+            self.evict()
+
+    # 总大小超过上限时删除最久未使用的条目，直到不超过上限的 EVICT_TO
+    def evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json.gz"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        entries.sort()
+        if total > self.max_bytes:
+            for _, size, path in entries:
+                if total <= self.max_bytes * EVICT_TO:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+        self._total = total
+
+    # 清空缓存
+    def clear(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json.gz"):
+                os.remove(os.path.join(self.cache_dir, name))
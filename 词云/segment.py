@@ -0,0 +1,272 @@
+import hashlib
+import importlib.metadata
+import marshal
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import lazyload
+
+# 分词与原始词频统计
+#
+# 串行模式逐个文件分词；并行模式把文件（大文件在段落边界处切块）分发到
+# 进程池，每个进程只加载一次 jieba 词典，各块返回的词频按原顺序合并，
+# 结果（包括词的先后顺序）与串行完全一致。
+#
+# 流式模式按段落分块读取文件，逐块用 jieba.cut 生成器分词并累加到同一个
+# Counter 中，内存占用只与词表大小有关，与文件大小无关。
+#
+# jieba 在第一次分词时才导入。加载好的前缀词典（包括自定义词典）按版本
+# 保存在 词典缓存/ 中，之后直接读取，不再重新构建或逐词添加自定义词。
+#
+# 分词之前先规范化文本（normalize_text）：网址和"（一）"、"1."之类的序号删除，
+# 标点、全角空格等换成换行符，连续的合并为一个。jieba 只在汉字、字母、数字
+# 组成的片段内成词，标点和空白本来就是片段的分界，所以其余词的切分不变；
+# 只是不再产生随后会被停用词和标点规则丢弃的标点、空白、序号和网址片段。
+# 空白（换行符）本身不计入词频：规范化会把相邻的换行合并，切块处两侧的换行
+# 在整体分词时是一个、分块时是两个，去掉后串行、并行、流式和增量统计的结果逐词相同。
+
+# 大文件切块的目标大小（字节）
+CHUNK_SIZE = 1 << 20
+
+# 流式读取时每次读入的字符数
+STREAM_CHARS = 1 << 16
+
+# 流式分块时可以断开的位置：换行符及常见中文标点（jieba 不会跨越它们成词）
+BREAK_CHARS = "\n。！？；，"
+
+# 自定义词典（可选），格式同 jieba.load_userdict：一行一个词
+USER_DICT = "userdict.txt"
+
+# 预构建词典的保存位置；词典格式有变化时把版本号加一
+DICT_CACHE_DIR = "词典缓存"
+DICT_CACHE_VERSION = 1
+
+_jieba_ready = False
+
+
+# jieba 版本号（不导入 jieba 本身）
+def jieba_version():
+    try:
+        return importlib.metadata.version("jieba")
+    except importlib.metadata.PackageNotFoundError:
+        return lazyload.load("jieba").__version__
+
+
+# 预构建词典的路径：由词典版本、jieba 版本和自定义词典内容决定
+def dict_cache_path():
+    version = jieba_version()
+    h = hashlib.sha256(f"{DICT_CACHE_VERSION}|{version}|".encode("utf-8"))
+    if os.path.isfile(USER_DICT):
+        with open(USER_DICT, "rb") as f:
+            h.update(f.read())
+    return os.path.join(DICT_CACHE_DIR, f"jieba-{version}-{h.hexdigest()[:16]}.cache")
+
+
+# 保存预构建词典，并删除旧版本的词典
+# 并行分词时多个进程可能同时构建、保存和清理：先写入各进程自己的临时文件再整体替换，
+# 读到的总是完整的词典；别的进程已经删掉的旧词典直接跳过
+def save_dict_cache(path, tokenizer):
+    os.makedirs(DICT_CACHE_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        marshal.dump((tokenizer.FREQ, tokenizer.total), f)
+    os.replace(tmp, path)
+    for name in os.listdir(DICT_CACHE_DIR):
+        old = os.path.join(DICT_CACHE_DIR, name)
+        if name.endswith(".cache") and old != path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+# 加载 jieba 词典和自定义词典（每个进程只做一次）
+def init_jieba():
+    global _jieba_ready
+    if _jieba_ready:
+        return
+    jieba = lazyload.load("jieba")
+    with lazyload.timed("jieba词典"):
+        tokenizer = jieba.dt
+        path = dict_cache_path()
+        try:
+            with open(path, "rb") as f:
+                tokenizer.FREQ, tokenizer.total = marshal.load(f)
+            tokenizer.initialized = True
+        except (OSError, EOFError, ValueError, TypeError):
+            jieba.initialize()
+            if os.path.isfile(USER_DICT):
+                jieba.load_userdict(USER_DICT)
+            save_dict_cache(path, tokenizer)
+    _jieba_ready = True
+
+
+# 进程池初始化：每个工作进程只加载一次 jieba 词典
+def init_worker():
+    init_jieba()
+
+
+# 按文本模式的规则统一换行符（与 open(..., "r") 读到的内容一致）
+def normalize_newlines(text):
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+# 换成换行符的标点和空白（都不在 jieba 成词的字符范围 [汉字a-zA-Z0-9+#&._%-] 内）
+_SEPARATORS = str.maketrans(dict.fromkeys(
+    "\u3000\u00a0\t\f\v ，。、；：？！…—–·“”‘’「」『』（）《》〈〉【】〔〕［］｛｝〖〗～"
+    "!\"'(),/:;<=>?@[\\]^`{|}~", "\n"))
+
+# 网址（遇到空白、汉字或中文标点为止）
+_URL = re.compile(r'(?:https?|ftp)://[^\s\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]+'
+                  r'|www\.[A-Za-z0-9.\-]+[A-Za-z0-9/_%?=&#.\-]*')
+
+# 序号："（一）"、"(3)"、"一、"、"1."、"2、"，只在行首或列表项开头（冒号、分号、句号之后）；
+# 数字必须是一到九十九的写法（"（五一）"不是序号），后面紧跟数字的如"1.5"不算
+_NUMERAL = r'(?:十[一二三四五六七八九]?|[一二三四五六七八九](?:十[一二三四五六七八九]?)?|\d{1,3})'
+_ENUMERATOR = re.compile(r'(?:^|(?<=[：；。:;]))[ \t\u3000]*'
+                         r'(?:[（(]\s*' + _NUMERAL + r'\s*[)）]|' + _NUMERAL + r'[、.．](?!\d))',
+                         re.MULTILINE)
+
+_NEWLINES = re.compile(r'\n{2,}')
+
+
+# 分词前的规范化（见文件开头的说明）
+def normalize_text(text):
+    text = _URL.sub("\n", text)
+    text = _ENUMERATOR.sub("\n", text)
+    return _NEWLINES.sub("\n", text.translate(_SEPARATORS))
+
+
+# 去掉空白词（见文件开头的说明），只需遍历词表
+def drop_whitespace(counts):
+    for word in [word for word in counts if word.isspace()]:
+        del counts[word]
+    return counts
+
+
+# 对一段文本分词并统计词频
+def count_text(text):
+    init_jieba()
+    return drop_whitespace(Counter(lazyload.load("jieba").cut(normalize_text(text))))
+
+
+# 按段落分块读取文本文件，每块约 chunk_chars 个字符
+# 块尾对齐到最后一个可断开的位置，剩余部分并入下一块
+def iter_text_chunks(path, chunk_chars=STREAM_CHARS):
+    carry = ""
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            block = f.read(chunk_chars)
+            if not block:
+                break
+            text = carry + block
+            cut = max(text.rfind(c) for c in BREAK_CHARS) + 1
+            if cut == 0:
+                # 整块都没有断开位置（极长的一段），继续向后读
+                carry = text
+                continue
+            yield text[:cut]
+            carry = text[cut:]
+    if carry:
+        yield carry
+
+
+# 流式统计：逐块分词，累加到同一个计数器，不保留完整文本和分词列表
+def count_file_streaming(path, chunk_chars=STREAM_CHARS):
+    init_jieba()
+    cut = lazyload.load("jieba").cut
+    counts = Counter()
+    for chunk in iter_text_chunks(path, chunk_chars):
+        counts.update(cut(normalize_text(chunk)))
+    return drop_whitespace(counts)
+
+
+# 串行读取并统计整个文件，stream=True 时使用流式统计
+def count_file(path, stream=False):
+    if stream:
+        return count_file_streaming(path)
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    return count_text(text)
+
+
+# 在段落边界（换行符之后）处把文件切成若干块，返回 [(起始字节, 结束字节), ...]
+# jieba 不会跨越换行符成词，因此按块分词的结果与整体分词相同
+def plan_chunks(path, chunk_size=CHUNK_SIZE):
+    size = os.path.getsize(path)
+    chunks = []
+    start = 0
+    with open(path, "rb") as f:
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                f.seek(end)
+                rest = f.readline()  # 读到本段末尾
+                end += len(rest)
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+# 读取文件中的一段字节并解码
+def read_range(path, start, end):
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return normalize_newlines(data.decode("utf-8"))
+
+
+# 工作进程任务：统计一个块的词频
+def count_range(task):
+    path, start, end = task
+    return count_text(read_range(path, start, end))
+
+
+# 统计多个文件的原始词频，返回 {路径: Counter}，顺序与 paths 一致
+# workers > 1 时使用进程池并行分词，stream=True 时串行模式使用流式统计
+# cache 为 segcache.SegmentCache 时，命中缓存的文件不再分词，新结果写回缓存
+# incremental 为 incremental.IncrementalCounter 时，只对文件末尾追加的部分分词
+def count_files(paths, workers=1, chunk_size=CHUNK_SIZE, stream=False, cache=None,
+                incremental=None):
+    results = {}
+    keys = {}
+    if cache is not None:
+        for path in paths:
+            keys[path] = cache.key_for(path)
+            counts = cache.get(keys[path])
+            if counts is not None:
+                results[path] = counts
+    todo = [path for path in paths if path not in results]
+
+    full = todo
+    if incremental is not None:
+        for path in todo:
+            counts = incremental.try_append(path)
+            if counts is not None:
+                results[path] = counts
+        full = [path for path in todo if path not in results]
+
+    if workers <= 1:
+        for path in full:
+            results[path] = count_file(path, stream)
+    elif full:
+        tasks = [(path, start, end) for path in full
+                 for start, end in plan_chunks(path, chunk_size)]
+        for path in full:
+            results[path] = Counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            # map 按提交顺序返回，按顺序合并可以保持词的首次出现顺序
+            for (path, _, _), counts in zip(tasks, pool.map(count_range, tasks)):
+                results[path].update(counts)
+
+    if incremental is not None:
+        for path in full:
+            incremental.record(path, results[path])
+    if cache is not None:
+        for path in todo:
+            cache.put(keys[path], results[path])
+    return {path: results[path] for path in paths}
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+
+from profiling import profiler
+from segcache import file_digest
+
+# 流水线的阶段图
+#
+# 每个阶段登记：执行函数、上游阶段、输入文件和影响结果的参数。
+# 阶段执行后把「输入摘要」和输出文件列表记录在状态文件中；下次运行时
+# 输入摘要没变且输出文件都还在，就跳过这个阶段。
+# 上游阶段的输出文件自动算作下游阶段的输入，上游结果变了下游才会重做。
+#
+#   graph = StageGraph()
+#   graph.add("count", run_count, inputs=lambda: corpus_files, params=lambda: {...})
+#   graph.add("tables", run_tables, deps=["count"], params=lambda: {...})
+#   graph.run(["tables"])                # 按需执行 count、tables
+#   graph.run(["tables"], only=True)     # 只执行 tables
+#   graph.run(["tables"], force=True)    # 不管是否最新都重新执行
+
+STATE_FILE = os.path.join("流水线", "状态.json")
+
+
+class StageError(Exception):
+    """阶段无法执行（如上游阶段还没有结果）"""
+
+
+class StageGraph:
+    """按依赖顺序执行阶段，跳过输入未变化的阶段"""
+
+    def __init__(self, state_file=STATE_FILE):
+        self.state_file = state_file
+        self.stages = {}
+        self.state = {}
+        if os.path.exists(state_file):
+            try:
+                with open(state_file, 'r', encoding='utf-8') as f:
+                    self.state = json.load(f)
+            except ValueError:
+                print(f"警告: 状态文件 '{state_file}' 已损坏，所有阶段将重新执行")
+
+    # 登记阶段：run() 执行阶段并返回输出文件列表，inputs() 返回输入文件列表，
+    # params() 返回影响结果的参数（可 JSON 序列化）
+    def add(self, name, run, deps=(), inputs=None, params=None):
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"阶段 '{name}' 依赖未登记的阶段 '{dep}'")
+        self.stages[name] = {
+            'run': run,
+            'deps': list(deps),
+            'inputs': inputs or (lambda: []),
+            'params': params or (lambda: {}),
+        }
+
+    # 执行 targets 需要的阶段（依赖在前），only=True 时不执行上游阶段
+    def plan(self, targets, only=False):
+        if only:
+            return [name for name in self.stages if name in targets]
+        order = []
+
+        def visit(name):
+            if name in order:
+                return
+            for dep in self.stages[name]['deps']:
+                visit(dep)
+            order.append(name)
+
+        for name in targets:
+            visit(name)
+        return order
+
+    # 阶段的输入摘要：参数 + 输入文件内容 + 上游阶段的输出文件内容
+    def digest(self, name):
+        stage = self.stages[name]
+        paths = list(stage['inputs']())
+        for dep in stage['deps']:
+            record = self.state.get(dep)
+            if record is None:
+                raise StageError(f"阶段 '{name}' 需要先执行 '{dep}'")
+            paths.extend(record['outputs'])
+        h = hashlib.sha256()
+        h.update(json.dumps(stage['params'](), sort_keys=True, ensure_ascii=False,
+                            default=str).encode("utf-8"))
+        for path in sorted(set(paths)):
+            h.update(b"\0" + path.encode("utf-8") + b"\0")
+            if os.path.isfile(path):
+                h.update(file_digest(path).encode("ascii"))
+        return h.hexdigest()
+
+    # 输入摘要与上次执行时相同，且输出文件都还在
+    def up_to_date(self, name, digest):
+        record = self.state.get(name)
+        return (record is not None and record['digest'] == digest
+                and all(os.path.exists(path) for path in record['outputs']))
+
+    # 依次执行阶段，返回实际执行的阶段列表
+    def run(self, targets, only=False, force=False):
+        executed = []
+        for name in self.plan(targets, only):
+            digest = self.digest(name)
+            if not force and self.up_to_date(name, digest):
+                print(f"[{name}] 输入未变化，跳过")
+                continue
+            print(f"[{name}] 开始执行")
+            with profiler.stage(name):
+                outputs = self.stages[name]['run']()
+            self.state[name] = {'digest': digest, 'outputs': sorted(outputs)}
+            self.save()
+            executed.append(name)
+        return executed
+
+    def save(self):
+        state_dir = os.path.dirname(self.state_file)
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        tmp = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.state_file)
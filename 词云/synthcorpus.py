@@ -0,0 +1,114 @@
+import argparse
+import os
+import re
+
+import lazyload
+from segment import jieba_version
+
+# 合成中文语料生成器（用于基准测试）
+#
+# 从 jieba 自带的词典中按词频抽词，随机插入逗号、句号和换行，生成指定大小
+# 的文本。同样的种子、大小和 jieba 版本得到完全相同的文件，可以在不同版本
+# 的代码之间对比耗时。按块生成、边生成边写入，1 GB 也不占用大量内存。
+#
+#   python synthcorpus.py 64MB synth.txt --seed 0
+
+# 每块生成的词数
+BLOCK_WORDS = 1 << 18
+
+# 每个位置被替换为标点的概率
+NEWLINE_RATE = 1 / 120   # 段落结束
+PERIOD_RATE = 1 / 18     # 句号
+COMMA_RATE = 1 / 7       # 逗号
+
+_CJK_WORD = re.compile(r'[一-鿿]+')
+_SIZE = re.compile(r'(\d+(?:\.\d+)?)\s*([KMG]?)B?', re.IGNORECASE)
+_UNITS = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+
+# "1MB"、"512KB"、"1GB" → 字节数
+def parse_size(text):
+    match = _SIZE.fullmatch(text.strip())
+    if not match:
+        raise ValueError(f"无法识别的大小: {text}")
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+# 可读的大小
+def format_size(size):
+    for unit in ('GB', 'MB', 'KB'):
+        if size >= _UNITS[unit[0]]:
+            return f"{size / _UNITS[unit[0]]:.4g}{unit}"
+    return f"{size}B"
+
+
+# jieba 词典中的纯中文词及其词频
+def dictionary_words():
+    jieba = lazyload.load("jieba")
+    words, freqs = [], []
+    with jieba.get_dict_file() as f:
+        for line in f:
+            parts = line.decode("utf-8").split()
+            if len(parts) >= 2 and _CJK_WORD.fullmatch(parts[0]):
+                words.append(parts[0])
+                freqs.append(int(parts[1]))
+    return words, freqs
+
+
+# 生成约 size 字节的文本写入 path，返回实际字节数
+def generate(path, size, seed=0):
+    np = lazyload.load("numpy")
+    words, freqs = dictionary_words()
+    vocab = np.array(words + ["，", "。", "。\n"], dtype=object)
+    comma, period, newline = len(words), len(words) + 1, len(words) + 2
+    p = np.array(freqs, dtype=np.float64)
+    p /= p.sum()
+    rng = np.random.default_rng(seed)
+
+    out_dir = os.path.dirname(path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    written = 0
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        while written < size:
+            ids = rng.choice(len(words), size=BLOCK_WORDS, p=p)
+            u = rng.random(BLOCK_WORDS)
+            ids[u < COMMA_RATE] = comma
+            ids[u < PERIOD_RATE] = period
+            ids[u < NEWLINE_RATE] = newline
+            data = "".join(vocab[ids].tolist()).encode("utf-8")
+            if written + len(data) > size:
+                # 最后一块截到目标大小（不截断半个汉字）
+                data = data[:size - written].decode("utf-8", "ignore").encode("utf-8")
+                f.write(data)
+                written += len(data)
+                break
+            f.write(data)
+            written += len(data)
+    os.replace(tmp, path)
+    return written
+
+
+# 取得合成语料：已生成过同样参数的文件时直接复用
+def ensure_corpus(folder, size, seed=0):
+    name = f"synth-{format_size(size)}-seed{seed}-jieba{jieba_version()}.txt"
+    path = os.path.join(folder, name)
+    if not os.path.exists(path):
+        print(f"正在生成合成语料 {path} ...")
+        generate(path, size, seed)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成中文语料")
+    parser.add_argument("size", help="目标大小，如 1MB、256MB、1GB")
+    parser.add_argument("output", help="输出文件")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+    written = generate(args.output, parse_size(args.size), args.seed)
+    print(f"已生成 {args.output}（{written:,} 字节）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import csv
+import html
+import os
+
+import lazyload
+
+# 词频总表的输出后端
+#
+# 每个后端是一个函数 (district_name, top50_data, output_dir) -> 输出文件路径，
+# 登记在 TABLE_BACKENDS 中，按名字选择：
+#   png   matplotlib 表格，300 dpi（原来的输出方式）
+#   pil   直接用 PIL 绘制同样的 25 行 × 8 列布局，不经过 matplotlib
+#         （保存为 <区名>_词频总表_pil.png，与 png 同时输出时不会互相覆盖）
+#   csv   逗号分隔文本（utf-8-sig，Excel 可直接打开）
+#   xlsx  openpyxl 只写模式流式写出
+#   html  HTML 表格
+# top50_data 为 [(词, 词频, "占比%"), ...]，不足 50 个时空位留白。
+
+FONT_PATH = 'simhei.ttf'
+
+HEADER = ["序号", "主题词", "词频 / 次", "占比", "序号", "主题词", "词频 / 次", "占比"]
+HEADER_COLOR = '#f0f0f0'
+ROWS = 25  # 两列各25行
+
+# 机器可读格式（csv、xlsx）的列名
+FLAT_HEADER = ["序号", "主题词", "词频", "占比"]
+
+
+def table_title(district_name):
+    return f"{district_name} xxx词频排名前50位"
+
+
+# 词频显示格式：千位用空格分隔
+def format_count(freq):
+    return f"{freq:,}".replace(",", " ")
+
+
+# 生成 25 行 × 8 列的表格内容（两列各25行）
+def table_rows(top50_data):
+    def cells(i):
+        if i < len(top50_data):
+            word, freq, ratio = top50_data[i]
+            return [i+1, word, format_count(freq), ratio]
+        return [i+1, "", "", ""]
+
+    return [cells(i) + cells(i + ROWS) for i in range(ROWS)]
+
+
+def output_path(output_dir, district_name, ext, suffix=""):
+    return os.path.join(output_dir, f"{district_name}_词频总表{suffix}.{ext}")
+
+
+# matplotlib 表格（原来的输出方式）
+def write_png(district_name, top50_data, output_dir):
+    plt = lazyload.pyplot()
+
+    # 创建图表
+    fig, ax = plt.subplots(figsize=(16, 12))
+    ax.axis('off')
+
+    # 创建表格
+    table = ax.table(
+        cellText=table_rows(top50_data),
+        colLabels=HEADER,
+        colColours=[HEADER_COLOR]*8,
+        cellLoc='center',
+        loc='center'
+    )
+
+    # 设置表格样式
+    table.auto_set_font_size(False)
+    table.set_fontsize(10)
+    table.scale(1, 2)  # 调整表格尺寸
+
+    # 设置标题
+    plt.title(table_title(district_name), fontsize=14, y=0.95, pad=20)
+
+    # 保存图片
+    output_file = output_path(output_dir, district_name, "png")
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.close()
+    return output_file
+
+
+# 加载字体，字体文件不可用时退回 PIL 默认字体
+def load_font(size):
+    ImageFont = lazyload.load("PIL.ImageFont")
+    try:
+        return ImageFont.truetype(FONT_PATH, size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+# 直接用 PIL 绘制表格，scale 为整体缩放倍数
+def render_table_image(title, header, rows, scale=2, col_widths=None, header_color=HEADER_COLOR):
+    Image = lazyload.load("PIL.Image")
+    ImageDraw = lazyload.load("PIL.ImageDraw")
+
+    font = load_font(14 * scale)
+    title_font = load_font(20 * scale)
+    row_h = 36 * scale
+    pad = 24 * scale
+    title_h = 56 * scale if title else 0
+    if col_widths is None:
+        col_widths = [60, 150, 100, 80] * (len(header) // 4) or [120] * len(header)
+    widths = [w * scale for w in col_widths]
+    width = sum(widths) + 2 * pad
+    height = title_h + row_h * (len(rows) + 1) + 2 * pad
+
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    if title:
+        draw.text((width // 2, pad + title_h // 2), title, font=title_font, fill="black", anchor="mm")
+
+    top = pad + title_h
+    draw.rectangle([pad, top, pad + sum(widths), top + row_h], fill=header_color)
+    for r, row in enumerate([header] + rows):
+        y = top + r * row_h
+        x = pad
+        for value, w in zip(row, widths):
+            text = str(value)
+            if text:
+                draw.text((x + w // 2, y + row_h // 2), text, font=font, fill="black", anchor="mm")
+            x += w
+
+    # 表格线
+    line = max(1, scale // 2)
+    bottom = top + row_h * (len(rows) + 1)
+    for r in range(len(rows) + 2):
+        y = top + r * row_h
+        draw.line([pad, y, pad + sum(widths), y], fill="black", width=line)
+    x = pad
+    for w in [0] + widths:
+        x += w
+        draw.line([x, top, x, bottom], fill="black", width=line)
+    return image
+
+
+def write_pil(district_name, top50_data, output_dir):
+    image = render_table_image(table_title(district_name), HEADER, table_rows(top50_data))
+    output_file = output_path(output_dir, district_name, "png", "_pil")
+    image.save(output_file, optimize=False, compress_level=1)
+    return output_file
+
+
+def flat_rows(top50_data):
+    return [[i+1, word, freq, ratio] for i, (word, freq, ratio) in enumerate(top50_data)]
+
+
+def write_csv(district_name, top50_data, output_dir):
+    output_file = output_path(output_dir, district_name, "csv")
+    with open(output_file, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(FLAT_HEADER)
+        writer.writerows(flat_rows(top50_data))
+    return output_file
+
+
+def write_xlsx(district_name, top50_data, output_dir):
+    openpyxl = lazyload.load("openpyxl")
+    wb = openpyxl.Workbook(write_only=True)
+    sheet = wb.create_sheet(title="词频总表")
+    sheet.append(FLAT_HEADER)
+    for row in flat_rows(top50_data):
+        sheet.append(row)
+    output_file = output_path(output_dir, district_name, "xlsx")
+    wb.save(output_file)
+    return output_file
+
+
+def write_html(district_name, top50_data, output_dir):
+    esc = html.escape
+    lines = [
+        "<!DOCTYPE html>",
+        '<html><head><meta charset="utf-8">',
+        f"<title>{esc(table_title(district_name))}</title>",
+        "<style>table{border-collapse:collapse}th,td{border:1px solid #000;"
+        f"padding:4px 12px;text-align:center}}th{{background:{HEADER_COLOR}}}</style>",
+        "</head><body>",
+        f"<h2>{esc(table_title(district_name))}</h2>",
+        "<table>",
+        "<tr>" + "".join(f"<th>{esc(h)}</th>" for h in HEADER) + "</tr>",
+    ]
+    for row in table_rows(top50_data):
+        lines.append("<tr>" + "".join(f"<td>{esc(str(v))}</td>" for v in row) + "</tr>")
+    lines.append("</table></body></html>")
+    output_file = output_path(output_dir, district_name, "html")
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    return output_file
+
+
+TABLE_BACKENDS = {
+    'png': write_png,
+    'pil': write_pil,
+    'csv': write_csv,
+    'xlsx': write_xlsx,
+    'html': write_html,
+}
+
+
+# 按选定的后端输出词频总表，返回输出文件列表
+def write_frequency_table(district_name, top50_data, output_dir, formats=('png',)):
+    outputs = []
+    for name in formats:
+        backend = TABLE_BACKENDS.get(name)
+        if backend is None:
+            print(f"警告: 未知的表格格式 '{name}'，可选: {', '.join(TABLE_BACKENDS)}")
+            continue
+        outputs.append(backend(district_name, top50_data, output_dir))
+    return outputs
@@ -0,0 +1,136 @@
+import os
+
+import lazyload
+from masks import extract_district_name
+from wordcount import TOKENS, DocCounts, count_arrays, rank_doc, top_k
+from wordfilter import TokenFilter
+
+# 跨城市的区分度分析：词-文档稀疏矩阵
+#
+# 所有文件共用一个词表（TokenIndex），原始词频组成一个 scipy.sparse CSR 矩阵
+# （行为文件，列为词ID）。在矩阵的非零元素上直接做向量化运算，得到每个城市
+# 每个词的区分度：
+#   tfidf    词频占比 × log(文件数 / 出现该词的文件数)；所有城市都出现的词为 0
+#   logodds  以全部文件为先验的 log-odds 比的 z 分数（Monroe 等, 2008），
+#            衡量这个词在该城市中比在其余城市中更常出现的程度
+# 只保留区分度为正的词。make_ranker 返回与 rank_doc 形式相同的函数，
+# 词频总表和词云图可以直接改用区分度排序和加权。
+# 建矩阵时先按过滤规则（停用词、词长、标点/数字）去掉不保留的词，文件长度、
+# 总词数和 log-odds 先验只由保留的词决定，不受换行、标点、停用词等噪声的影响，
+# 规范化、去重或切块方式变化时分数也不会随之漂移。
+# 建矩阵时保留的是全局规则或任一城市的规则（见 TokenFilter.for_city）保留的词，
+# 城市文件中用 "!词" 取消的全局停用词也在矩阵中；各城市的规则在 rank 中再过滤。
+
+WEIGHTINGS = ('freq', 'tfidf', 'logodds')
+
+# log-odds 先验的总强度（先验按各词在全部文件中的占比分配）
+LOG_ODDS_PRIOR = 1000.0
+
+
+class TermMatrix:
+    """全部文件的词-文档矩阵"""
+
+    def __init__(self, docs, index=TOKENS, token_filter=None):
+        np = lazyload.load("numpy")
+        sparse = lazyload.load("scipy.sparse")
+        if token_filter is None:
+            token_filter = TokenFilter()
+        self.index = index
+        self.names = list(docs)
+        self.rows = {name: i for i, name in enumerate(self.names)}
+        arrays = [count_arrays(docs[name], index) for name in self.names]
+        # 词表在统计全部文件之后才完整，再取保留标记（全局规则和各城市规则的并集）
+        keep = token_filter.keep_flags(index).copy()
+        for name in self.names:
+            city = extract_district_name(os.path.basename(name))
+            keep |= token_filter.for_city(city).keep_flags(index)
+        ids, counts = [], []
+        for doc_ids, doc_counts in arrays:
+            mask = keep[doc_ids]
+            ids.append(doc_ids[mask])
+            counts.append(doc_counts[mask])
+        indptr = np.zeros(len(self.names) + 1, dtype=np.int64)
+        np.cumsum([len(a) for a in ids], out=indptr[1:])
+        empty = np.empty(0, dtype=np.int64)
+        # 每行内保持该文件中词的首次出现顺序（相同分数时按此顺序排列）
+        self.matrix = sparse.csr_matrix(
+            (np.concatenate(counts) if counts else empty,
+             np.concatenate(ids) if ids else empty, indptr),
+            shape=(len(self.names), len(index)))
+
+    # 与词频矩阵同样稀疏结构的分数矩阵
+    def _like(self, data):
+        sparse = lazyload.load("scipy.sparse")
+        m = self.matrix
+        return sparse.csr_matrix((data, m.indices, m.indptr), shape=m.shape)
+
+    # 每个非零元素所在的行
+    def _row_of_entries(self):
+        np = lazyload.load("numpy")
+        return np.repeat(np.arange(self.matrix.shape[0]), np.diff(self.matrix.indptr))
+
+    def tfidf(self):
+        np = lazyload.load("numpy")
+        m = self.matrix
+        doc_len = np.asarray(m.sum(axis=1)).ravel().astype(np.float64)
+        df = np.bincount(m.indices, minlength=m.shape[1])
+        idf = np.log(m.shape[0] / np.maximum(df, 1))
+        rows = self._row_of_entries()
+        tf = m.data / np.maximum(doc_len[rows], 1)
+        return self._like(tf * idf[m.indices])
+
+    def log_odds(self, prior=LOG_ODDS_PRIOR):
+        np = lazyload.load("numpy")
+        m = self.matrix
+        y = m.data.astype(np.float64)
+        word_total = np.bincount(m.indices, weights=y, minlength=m.shape[1])
+        doc_len = np.asarray(m.sum(axis=1)).ravel().astype(np.float64)
+        grand = doc_len.sum()
+        rows = self._row_of_entries()
+
+        alpha = prior * word_total[m.indices] / grand   # 每个词的先验
+        y_rest = word_total[m.indices] - y               # 其余城市中的次数
+        n = doc_len[rows]
+        n_rest = grand - n
+        delta = (np.log((y + alpha) / (n + prior - y - alpha))
+                 - np.log((y_rest + alpha) / (n_rest + prior - y_rest - alpha)))
+        variance = 1 / (y + alpha) + 1 / (y_rest + alpha)
+        return self._like(delta / np.sqrt(variance))
+
+    def scores(self, method):
+        if method == 'tfidf':
+            return self.tfidf()
+        if method == 'logodds':
+            return self.log_odds()
+        raise ValueError(f"未知的区分度算法 '{method}'，可选: {', '.join(WEIGHTINGS[1:])}")
+
+    # 按区分度过滤并取 Top-K，返回 (区分度 DocCounts, [(词, 原始词频), ...], 过滤后的总词频)
+    # 停用词和词长规则仍按 token_filter 过滤；区分度本身已经体现了词的重要性，不再加权
+    def rank(self, name, scores, token_filter, k):
+        i = self.rows[name]
+        start, end = self.matrix.indptr[i], self.matrix.indptr[i + 1]
+        ids = self.matrix.indices[start:end]
+        counts = self.matrix.data[start:end]
+        values = scores.data[start:end]
+        keep = token_filter.keep_flags(self.index)[ids]
+        total = int(counts[keep].sum())
+        keep &= values > 0
+        ids, counts, values = ids[keep], counts[keep], values[keep]
+        words = self.index.words
+        top = [(words[ids[j]], int(counts[j])) for j in top_k(values, k)]
+        return DocCounts(ids, values, self.index), top, total
+
+
+# 返回 rank(name, token_filter, k) -> (权重 DocCounts, [(词, 词频), ...], 总词频)
+# method 为 freq 时与 rank_doc 完全相同；文件少于 2 个时无法比较，退回 freq
+# token_filter 为建矩阵时使用的过滤规则（默认全局停用词和词长规则，连同各城市的规则）
+def make_ranker(docs, method='freq', index=TOKENS, token_filter=None):
+    if method != 'freq' and len(docs) < 2:
+        print(f"警告: 只有 {len(docs)} 个文件，无法计算区分度，按词频排序")
+        method = 'freq'
+    if method == 'freq':
+        return lambda name, token_filter, k: rank_doc(DocCounts.from_counts(docs[name], index),
+                                                      token_filter, k)
+    matrix = TermMatrix(docs, index, token_filter)
+    scores = matrix.scores(method)
+    return lambda name, token_filter, k: matrix.rank(name, scores, token_filter, k)
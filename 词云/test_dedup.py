@@ -0,0 +1,86 @@
+import os
+import random
+
+import dedup
+from dedup import dedup_file, dedup_files
+
+# 完全重复、近似重复（MinHash/LSH）的段落只保留第一次出现；原文件和参数不变时复用结果
+
+
+def paragraph(seed, length=300):
+    rng = random.Random(seed)
+    return "".join(chr(rng.randint(0x4E00, 0x4E00 + 2000)) for _ in range(length))
+
+
+def write(path, lines):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.writelines(lines)
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return f.readlines()
+
+
+def test_exact_duplicates(tmp_path):
+    a, b = paragraph(1, 40), paragraph(2, 40)
+    lines = [a + "\n", "第一条\n", b + "\r\n", "第一条\n",
+             f"  {a[:20]}，{a[20:]}。\n",       # 只差空白和标点
+             a.upper() + "\n", "\n", b + "\n"]
+    src, dst = tmp_path / "上海.txt", tmp_path / "out" / "上海.txt"
+    write(src, lines)
+    stats = dedup_file(str(src), str(dst), near=False)
+    # 保留的段落（包括短段落和空行）与原文逐字节相同
+    assert read(dst) == [a + "\n", "第一条\n", b + "\r\n", "第一条\n", "\n"]
+    assert stats["exact_removed"] == 3 and stats["near_removed"] == 0
+    assert stats["bytes_in"] == os.path.getsize(src)
+    assert stats["bytes_in"] - stats["bytes_removed"] == os.path.getsize(dst)
+
+
+def test_near_duplicates(tmp_path):
+    a, b = paragraph(1), paragraph(2)
+    edited = a[:150] + "改" + a[151:]       # 改了一个字
+    lines = [a + "\n", b + "\n", edited + "\n"]
+    src = tmp_path / "上海.txt"
+    write(src, lines)
+
+    stats = dedup_file(str(src), str(tmp_path / "近似.txt"))
+    assert read(tmp_path / "近似.txt") == lines[:2]
+    assert stats["near_removed"] == 1 and stats["exact_removed"] == 0
+
+    # 只去完全重复时保留
+    dedup_file(str(src), str(tmp_path / "完全.txt"), near=False)
+    assert read(tmp_path / "完全.txt") == lines
+
+
+def test_reuse_unless_source_or_params_change(tmp_path, monkeypatch, capsys):
+    src = tmp_path / "上海.txt"
+    write(src, [paragraph(1) + "\n"] * 3)
+    out_dir = str(tmp_path / "去重语料")
+
+    dst = dedup_files([str(src)], out_dir)[str(src)]
+    assert "复用" not in capsys.readouterr().out
+    mtime = os.stat(dst).st_mtime_ns
+
+    # 没有变化：复用上次的结果，同样报告统计
+    assert dedup_files([str(src)], out_dir)[str(src)] == dst
+    out = capsys.readouterr().out
+    assert "复用" in out and "完全重复 2 段" in out
+    assert os.stat(dst).st_mtime_ns == mtime
+
+    # 参数变化：重新去重（段落短于 MIN_CHARS 时全部保留）
+    monkeypatch.setattr(dedup, "MIN_CHARS", 1000)
+    dedup_files([str(src)], out_dir)
+    assert "复用" not in capsys.readouterr().out
+    assert len(read(dst)) == 3
+    monkeypatch.undo()
+
+    # 原文件变化：重新去重
+    dedup_files([str(src)], out_dir)
+    capsys.readouterr()
+    write(src, [paragraph(1) + "\n"] * 2 + [paragraph(2) + "\n"])
+    newer = os.stat(dst).st_mtime_ns + 10 ** 9
+    os.utime(src, ns=(newer, newer))
+    dedup_files([str(src)], out_dir)
+    assert "复用" not in capsys.readouterr().out
+    assert len(read(dst)) == 2
@@ -0,0 +1,104 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import fetch
+from searchcache import ResponseCache
+
+# 对本地服务器抓取：同时进行的请求数、请求间隔、失败计数和写入的正文
+
+DELAY = 0.2     # 服务器处理每个请求的时间（秒）
+
+
+class SearchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SearchHandler)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.arrivals = []
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        keyword = parse_qs(urlparse(self.path).query)["wd"][0]
+        with server.lock:
+            server.arrivals.append(time.monotonic())
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(DELAY)
+            if keyword.startswith("失败"):
+                self.send_response(500)
+                self.end_headers()
+                return
+            if keyword.startswith("空白"):
+                body = "<html><script>var x = 1;</script></html>"
+            else:
+                body = f"<html><head><title>标题</title></head><body><p>{keyword} 的正文</p></body></html>"
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def serve():
+    server = SearchServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/s?wd={{keyword}}"
+
+
+def test_fetch_against_local_server(tmp_path):
+    server, search_url = serve()
+    keywords = [f"关键词{i}" for i in range(6)] + ["失败1", "空白1"]
+    output = tmp_path / "xxx" / "上海.txt"
+    completed = []
+    # 缓存目录是一个普通文件：写入缓存失败，抓取照常进行
+    blocked = tmp_path / "搜索缓存"
+    blocked.write_text("")
+    try:
+        done, failed = fetch.run_fetch(keywords, str(output), search_url=search_url,
+                                       concurrency=2, rate=10, on_done=completed.append,
+                                       cache=ResponseCache(str(blocked)))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert (done, failed) == (6, 2)
+    assert sorted(completed) == sorted(keywords[:6])
+    assert len(server.arrivals) == len(keywords)
+    assert server.max_active == 2
+    # 每秒最多 10 个请求：相邻请求至少间隔约 0.1 秒
+    gaps = [b - a for a, b in zip(server.arrivals, server.arrivals[1:])]
+    assert min(gaps) > 0.07
+
+    blocks = output.read_text(encoding="utf-8").split("\n\n")
+    assert blocks[-1] == ""
+    assert sorted(blocks[:-1]) == sorted(f"{kw} 的正文" for kw in keywords[:6])
+
+
+def test_existing_text_is_not_appended_again(tmp_path):
+    server, search_url = serve()
+    output = tmp_path / "上海.txt"
+    try:
+        for _ in range(2):
+            done, failed = fetch.run_fetch(["关键词1", "关键词2"], str(output),
+                                           search_url=search_url, rate=0)
+            assert (done, failed) == (2, 0)
+    finally:
+        server.shutdown()
+        server.server_close()
+    text = output.read_text(encoding="utf-8")
+    assert text.count("关键词1 的正文") == 1 and text.count("关键词2 的正文") == 1
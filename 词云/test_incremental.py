@@ -0,0 +1,38 @@
+import os
+
+import segment
+from incremental import IncrementalCounter
+
+# 追加后的增量统计必须与全量重新统计的结果逐词相同
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "xxx", "上海.txt")
+
+
+def read_lines():
+    with open(CORPUS, "r", encoding="utf-8", newline="") as f:
+        return f.readlines()
+
+
+def test_appended_counts_match_full_recount(tmp_path):
+    lines = read_lines()
+    path = str(tmp_path / "上海.txt")
+    tracker = IncrementalCounter(state_dir=str(tmp_path / "增量状态"))
+
+    # 先全量统计前一部分（末尾是半段，没有换行）
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.writelines(lines[:200])
+        f.write(lines[200][:30])
+    tracker.record(path, segment.count_file(path))
+
+    # 追加：补全半段、空行（包括紧接在上次处理位置之后的空行）、整段，以及新的半段
+    appends = [lines[200][30:] + "\n\n" + "".join(lines[201:400]),
+               "\n" + "".join(lines[400:450]),
+               "".join(lines[450:600]) + lines[600][:10],
+               lines[600][10:] + "\r\n　\n" + "".join(lines[601:700])]
+    for text in appends:
+        with open(path, "a", encoding="utf-8", newline="") as f:
+            f.write(text)
+        appended = tracker.try_append(path)
+        assert appended is not None
+        assert appended == segment.count_file(path)
+    assert tracker.appended == len(appends)
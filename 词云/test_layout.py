@@ -0,0 +1,69 @@
+import os
+
+import matplotlib
+
+from layout import RESIZE_TOLERANCE, load_layout, layout_path, slot_key
+from render import build_cloud
+
+# 布局缓存：词频相同时复用的布局与重新布局完全相同；
+# 增量重排对同样的输入总是得到同样的结果，保持不动的词留在原位
+
+FONT = os.path.join(matplotlib.get_data_path(), "fonts", "ttf", "DejaVuSans.ttf")
+
+WORDS = {f"word{i:02d}": 200 - 5 * i for i in range(30)}
+
+
+def make_job(tmp_path, words, cache=True, relayout=False):
+    return {
+        'options': {'font_path': FONT, 'width': 400, 'height': 300, 'max_words': 50,
+                    'max_font_size': 60, 'background_color': 'black'},
+        'color': 'white',
+        'words': words,
+        'output_file': str(tmp_path / "上海_词云图.png"),
+        'layout_cache': str(tmp_path / "布局缓存") if cache else None,
+        'relayout': relayout,
+    }
+
+
+def positions_of(layout):
+    return {word: (size, pos, orientation) for (word, _), size, pos, orientation, _ in layout}
+
+
+def test_cache_hit_matches_fresh_fit(tmp_path):
+    fresh = build_cloud(make_job(tmp_path, WORDS, cache=False))
+    first = build_cloud(make_job(tmp_path, WORDS))
+    cached = build_cloud(make_job(tmp_path, WORDS))
+    assert cached.layout_ == fresh.layout_ == first.layout_
+    assert cached.to_array().tobytes() == fresh.to_array().tobytes()
+
+
+def test_relayout_is_deterministic_and_keeps_words(tmp_path):
+    build_cloud(make_job(tmp_path, WORDS))
+    path = layout_path(str(tmp_path / "布局缓存"), slot_key(make_job(tmp_path, WORDS)))
+    with open(path, "rb") as f:
+        saved = f.read()
+    old = {word: (size, (x, y), orientation)
+           for word, _, size, x, y, orientation, _ in load_layout(path)[1]}
+
+    # 删掉两个词、加入两个新词、一个词的词频大幅下降，其余（包括最大值）不变
+    changed = dict(WORDS)
+    del changed["word05"], changed["word20"]
+    changed["word10"] = WORDS["word10"] * (1 - 3 * RESIZE_TOLERANCE)
+    changed.update(newword=120, another=90)
+
+    layouts = []
+    for _ in range(2):
+        # 每次都从同一份上次布局开始
+        with open(path, "wb") as f:
+            f.write(saved)
+        layouts.append(build_cloud(make_job(tmp_path, changed, relayout=True)).layout_)
+    assert layouts[0] == layouts[1]
+
+    placed = positions_of(layouts[0])
+    assert "newword" in placed and "another" in placed
+    assert "word05" not in placed and "word20" not in placed
+    kept = [word for word in changed if word in old and word != "word10"]
+    assert len(kept) == 27
+    for word in kept:
+        size, pos, orientation = placed[word]
+        assert (size, pos, None if orientation is None else int(orientation)) == old[word]
@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+import masks
+from masks import AssetIndex, load_mask
+
+# 背景图按 直接匹配 → 区名匹配 → 不区分大小写、去除空格 的顺序查找；
+# 蒙版缓存在 PNG 的修改时间或大小变化后重新生成
+
+
+def write_png(path, value, size=(8, 6)):
+    Image.fromarray(np.full(size[::-1], value, dtype=np.uint8)).save(path)
+
+
+def test_lookup_order(tmp_path):
+    for name in ("浦东新区 政策.png", "浦东新区.png", "pudong.png"):
+        write_png(tmp_path / name, 0)
+    index = AssetIndex(str(tmp_path))
+    assert index
+
+    # 1. 文件名与图片名完全相同时优先直接匹配，不看区名
+    assert index.find("浦东新区 政策.txt") == os.path.join(str(tmp_path), "浦东新区 政策.png")
+    # 2. 没有同名图片时按区名匹配
+    assert index.find("浦东新区 报告.txt") == os.path.join(str(tmp_path), "浦东新区.png")
+    # 3. 最后不区分大小写、去除空格
+    assert index.find("Pu Dong.txt") == os.path.join(str(tmp_path), "pudong.png")
+    assert index.find("黄浦区.txt") is None
+
+
+def test_missing_folder(tmp_path):
+    index = AssetIndex(str(tmp_path / "不存在"))
+    assert not index
+    assert index.find("上海.txt") is None
+
+
+def cached_files():
+    return sorted(os.listdir(masks.MASK_CACHE_DIR))
+
+
+def test_mask_cache_invalidated_on_change(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    png = str(tmp_path / "上海.png")
+    write_png(png, 10)
+    assert load_mask(png)[0, 0] == 10
+    first = cached_files()
+    assert len(first) == 1
+
+    # 没有变化时复用缓存
+    assert load_mask(png)[0, 0] == 10
+    assert cached_files() == first
+
+    # 修改时间变化（大小不变）：重新解码，删除旧缓存
+    size = os.path.getsize(png)
+    write_png(png, 20)
+    st = os.stat(png)
+    assert st.st_size == size
+    os.utime(png, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert load_mask(png)[0, 0] == 20
+    second = cached_files()
+    assert len(second) == 1 and second != first
+
+    # 大小变化（修改时间不变）：同样重新解码
+    mtime_ns = os.stat(png).st_mtime_ns
+    write_png(png, 30, size=(16, 12))
+    os.utime(png, ns=(mtime_ns, mtime_ns))
+    assert os.path.getsize(png) != size
+    mask = load_mask(png)
+    assert mask.shape == (12, 16) and mask[0, 0] == 30
+    third = cached_files()
+    assert len(third) == 1 and third != second
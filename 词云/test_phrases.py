@@ -0,0 +1,46 @@
+from phrases import merge_phrases, mine_phrases
+from wordcount import TokenIndex
+from wordfilter import TokenFilter
+
+# 固定的分词结果上挖掘短语：次数下限、PMI 下限、停用词和标点隔断、长度上限；并入词频时同样加权
+
+FILTER = TokenFilter(stopwords={"的"})
+
+
+def corpus():
+    tokens = []
+    tokens += ["未来", "产业", "，"] * 6                    # 二元短语
+    tokens += ["数字", "经济", "平台", "。"] * 5            # 三元短语（及其中的二元短语）
+    tokens += ["人工", "智能", "，"] * 4                    # 次数不够
+    tokens += ["企业", "的", "服务", "，"] * 6              # 中间隔着停用词
+    tokens += ["长长长长长", "短短短短短", "，"] * 6        # 超过 MAX_PHRASE_LEN 个字
+    tokens += ["推动", "发展", "，"] * 6                    # 次数够，但两个词都很常见
+    tokens += ["推动", "，", "发展", "。"] * 60
+    return tokens
+
+
+def test_mine_phrases():
+    index = TokenIndex()
+    ids = index.encode(corpus())
+
+    phrases = mine_phrases(ids, FILTER, index)
+    assert phrases == {"未来产业": 6, "数字经济": 5, "经济平台": 5, "数字经济平台": 5}
+    assert list(phrases)[0] == "未来产业"
+
+    # 只按次数筛选时常见词的搭配也保留，隔断和长度规则不变
+    counted = mine_phrases(ids, FILTER, index, method='count')
+    assert counted == dict(phrases, 推动发展=6)
+
+    # 只挖二元短语
+    assert "数字经济平台" not in mine_phrases(ids, FILTER, index, max_n=2)
+
+
+def test_merge_phrases():
+    words = {"未来": 6, "产业": 6, "未来产业": 2}
+    phrases = {"未来产业": 6, "数字经济平台": 5}
+    assert merge_phrases(words, phrases, FILTER) == {"未来": 6, "产业": 6, "未来产业": 8,
+                                                     "数字经济平台": 5}
+    weighted = TokenFilter(stopwords={"的"}, weighted=True)
+    assert merge_phrases(words, phrases, weighted) == {"未来": 6, "产业": 6, "未来产业": 23,
+                                                       "数字经济平台": 17}
+    assert words == {"未来": 6, "产业": 6, "未来产业": 2}
@@ -0,0 +1,44 @@
+import argparse
+
+import pipeline
+
+# 阶段图：第二次运行跳过全部阶段；只修改停用词时只重新执行 tables
+
+TEXTS = {
+    "上海.txt": "上海市人民政府关于推进高质量发展的实施意见。\n支持企业创新，优化营商环境，服务企业发展。\n",
+    "北京.txt": "北京市推进科技创新中心建设。\n支持企业研发，完善创新服务体系，企业发展环境持续优化。\n",
+}
+
+
+def make_args(tmp_path):
+    return argparse.Namespace(docs=str(tmp_path / "xxx"), images=str(tmp_path / "地区抠图"),
+                              output=str(tmp_path / "输出"), tables="csv", jobs=1,
+                              stream=False, weighting="freq", relayout=False, phrases=False,
+                              dedup=None, excel=None, search_url=pipeline.fetch.SEARCH_URL)
+
+
+def run(args, targets):
+    return pipeline.build_graph(args).run(targets)
+
+
+def test_second_run_skips_and_stopwords_rerun_tables(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "xxx").mkdir()
+    for name, text in TEXTS.items():
+        (tmp_path / "xxx" / name).write_text(text, encoding="utf-8")
+    (tmp_path / "stop.txt").write_text("关于\n", encoding="utf-8")
+    args = make_args(tmp_path)
+    targets = ["count", "tables"]
+
+    assert run(args, targets) == ["count", "tables"]
+    table = tmp_path / "输出" / "上海_词频总表.csv"
+    assert "企业" in table.read_text(encoding="utf-8-sig")
+
+    # 什么都没变：全部跳过
+    assert run(args, targets) == []
+
+    # 修改停用词：词频不用重新统计，只重做词频总表
+    (tmp_path / "stop.txt").write_text("关于\n企业\n", encoding="utf-8")
+    assert run(args, targets) == ["tables"]
+    assert "企业" not in table.read_text(encoding="utf-8-sig")
+    assert run(args, targets) == []
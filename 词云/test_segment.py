@@ -0,0 +1,33 @@
+import os
+
+import segment
+
+# 串行、并行（小块）和流式统计的原始词频必须逐词相同（见 segment 开头的说明）
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "xxx", "上海.txt")
+
+
+def test_parallel_matches_serial_at_small_chunks():
+    serial = segment.count_files([CORPUS])[CORPUS]
+    for chunk_size in (4 << 10, 64 << 10):
+        parallel = segment.count_files([CORPUS], workers=2, chunk_size=chunk_size)[CORPUS]
+        assert parallel == serial
+        assert list(parallel) == list(serial)
+
+
+def test_streaming_matches_serial_at_small_chunks():
+    serial = segment.count_file(CORPUS)
+    assert segment.count_file_streaming(CORPUS, chunk_chars=1 << 10) == serial
+
+
+def test_no_whitespace_tokens():
+    counts = segment.count_text("第一段，内容。\n\n　第二段 内容\r\n")
+    assert not [word for word in counts if word.isspace()]
+
+
+def test_enumerators_only_at_item_start():
+    assert "五一" in segment.normalize_text("（五一）劳动节").split()
+    assert "十一" in segment.normalize_text("国庆（十一）假期").split()
+    assert segment.normalize_text("（一）总体要求\n2.加强领导；(3)完善机制").split() == \
+        ["总体要求", "加强领导", "完善机制"]
+    assert segment.normalize_text("增长1.5倍").split() == ["增长1.5倍"]
@@ -0,0 +1,59 @@
+from collections import Counter
+
+from termmatrix import make_ranker
+from wordcount import TokenIndex
+from wordfilter import TokenFilter
+
+# 区分度只由保留的词决定：加入换行、标点、数字、停用词等噪声后排序和分数不变；
+# 城市停用词文件中 "!词" 取消的全局停用词仍参与该城市的区分度
+
+DOCS = {
+    "上海.txt": Counter({"企业": 120, "服务": 90, "浦东新区": 40, "自贸区": 35, "监管": 60, "建设": 50}),
+    "北京.txt": Counter({"企业": 100, "服务": 110, "中关村": 45, "首都": 30, "监管": 20, "建设": 70}),
+    "杭州.txt": Counter({"企业": 80, "服务": 60, "数字经济": 50, "亚运": 15, "监管": 25, "建设": 40}),
+}
+
+NOISE = {"\n": 5000, "，": 3000, "。": 2000, "2023": 400, "的": 900, "一": 700, "——": 50}
+
+FILTER = TokenFilter(stopwords={"\n", "的"}, drop_noise=True)
+
+
+def with_noise(docs, scale):
+    noisy = {}
+    for i, (name, counts) in enumerate(docs.items()):
+        counts = Counter(counts)
+        counts.update({word: n * scale * (i + 1) for word, n in NOISE.items()})
+        noisy[name] = counts
+    return noisy
+
+
+def ranking(docs, method):
+    rank = make_ranker(docs, method, TokenIndex(), token_filter=FILTER)
+    return {name: rank(name, FILTER, 0) for name in docs}
+
+
+def test_noise_tokens_do_not_change_ranking():
+    for method in ("tfidf", "logodds"):
+        clean = ranking(DOCS, method)
+        for scale in (1, 7):
+            noisy = ranking(with_noise(DOCS, scale), method)
+            for name in DOCS:
+                weights, top, total = clean[name]
+                noisy_weights, noisy_top, noisy_total = noisy[name]
+                assert noisy_top == top
+                assert noisy_total == total
+                assert noisy_weights.to_dict() == weights.to_dict()
+
+
+def test_city_keep_words_are_ranked(tmp_path):
+    (tmp_path / "上海.txt").write_text("!外滩\n", encoding="utf-8")
+    token_filter = TokenFilter(stopwords={"外滩"}, city_dir=str(tmp_path))
+    docs = dict(DOCS)
+    docs["上海.txt"] = DOCS["上海.txt"] + Counter({"外滩": 80})
+    for method in ("tfidf", "logodds"):
+        rank = make_ranker(docs, method, TokenIndex(), token_filter=token_filter)
+        weights, top, total = rank("上海.txt", token_filter.for_city("上海"), 0)
+        assert weights.to_dict()["外滩"] > 0
+        assert total == sum(docs["上海.txt"].values())
+        weights, top, total = rank("北京.txt", token_filter.for_city("北京"), 0)
+        assert "外滩" not in weights.to_dict()
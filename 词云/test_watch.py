@@ -0,0 +1,60 @@
+import argparse
+import os
+import shutil
+
+import matplotlib
+
+from watch import WatchSession
+
+# 监视模式：没有保留的词的城市跳过；某个城市出错时其余城市照常生成，监视不中断
+
+FONT = os.path.join(matplotlib.get_data_path(), "fonts", "ttf", "DejaVuSans.ttf")
+
+TEXT = "上海市人民政府关于推进高质量发展的实施意见。\n支持企业创新，优化营商环境，服务企业发展。\n"
+
+
+def make_session(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(FONT, tmp_path / "simhei.ttf")
+    (tmp_path / "stop.txt").write_text("关于\n", encoding="utf-8")
+    (tmp_path / "xxx").mkdir()
+    (tmp_path / "地区抠图").mkdir()
+    (tmp_path / "xxx" / "上海.txt").write_text(TEXT, encoding="utf-8")
+    args = argparse.Namespace(docs="xxx", images="地区抠图", output="输出", tables="csv",
+                              jobs=1, relayout=False, preview=None)
+    session = WatchSession(args)
+    texts = session.texts()
+    session.recount(texts)
+    session.render(texts)
+    return session
+
+
+def test_empty_city_is_skipped(tmp_path, monkeypatch):
+    session = make_session(tmp_path, monkeypatch)
+    assert (tmp_path / "输出" / "上海_词云图.png").exists()
+
+    new_city = os.path.join("xxx", "新城市.txt")
+    (tmp_path / new_city).write_text("", encoding="utf-8")
+    assert session.update({new_city}) == 1
+    assert not (tmp_path / "输出" / "新城市_词云图.png").exists()
+    assert not (tmp_path / "输出" / "新城市_词频总表.csv").exists()
+
+    # 之后写入内容时照常生成
+    (tmp_path / new_city).write_text(TEXT, encoding="utf-8")
+    assert session.update({new_city}) == 1
+    assert (tmp_path / "输出" / "新城市_词云图.png").exists()
+
+
+def test_failing_city_does_not_stop_others(tmp_path, monkeypatch):
+    session = make_session(tmp_path, monkeypatch)
+    # 北京的背景图已损坏：北京的词云图生成失败，上海照常生成
+    (tmp_path / "地区抠图" / "北京.png").write_bytes(b"not a png")
+    (tmp_path / "xxx" / "北京.txt").write_text(TEXT, encoding="utf-8")
+    cloud = tmp_path / "输出" / "上海_词云图.png"
+    os.remove(cloud)
+    changed = {os.path.join("xxx", "北京.txt"), os.path.join("xxx", "上海.txt"),
+               os.path.join("地区抠图", "北京.png")}
+    assert session.update(changed) == 2
+    assert cloud.exists()
+    assert (tmp_path / "输出" / "北京_词频总表.csv").exists()
+    assert not (tmp_path / "输出" / "北京_词云图.png").exists()
@@ -0,0 +1,251 @@
+import argparse
+import functools
+import glob
+import os
+import time
+
+import lazyload
+from incremental import IncrementalCounter
+from layout import LAYOUT_DIR
+from masks import AssetIndex, extract_district_name
+from render import render_clouds, preview_job, DISTRICT_STYLE, PLAIN_STYLE, PREVIEW_SCALE
+from segcache import SegmentCache
+from segment import count_files
+from tables import TABLE_BACKENDS, write_frequency_table
+from wordcount import DocCounts, rank_doc, cloud_words
+from wordfilter import TokenFilter, STOP_FILE, CITY_STOP_DIR
+
+# 监视模式：语料、停用词或背景图有变化时，只重新计算受影响的城市
+#
+#   python watch.py                 监视 xxx/、stop.txt、城市停用词/ 和 地区抠图/
+#   python watch.py --relayout      词频略有变化时在上次布局的基础上增量重排（见 layout）
+#   python watch.py --preview       只生成低分辨率预览（见 render.preview_job）
+#
+# 每隔 POLL_INTERVAL 秒比较一次各文件的修改时间和大小（不依赖额外的库），
+# 发现变化后等到连续 DEBOUNCE 秒没有新的变化再处理，一次粘贴或保存多次只处理一遍。
+#   xxx/<城市>.txt 变化       重新统计该城市的词频（分词缓存、追加内容增量统计），
+#                            重新生成该城市的词频总表和词云图；删除时只从内存中移除
+#   stop.txt 变化             不重新分词，用内存中的词频对所有城市重新过滤、生成
+#   城市停用词/<城市>.txt 变化  只对该城市重新过滤、生成
+#   地区抠图/ 中的图片变化     只重新生成背景图有变化的城市的词云图
+# 词云图的样式与 pipeline.py clouds 相同：有背景图时为彩色样式，否则黑底白字。
+# 没有保留的词（如刚新建的空文件）的城市跳过；某个城市出错时记录下来，其余城市照常处理，
+# 监视继续进行。监视开始时先完整生成一遍。按 Ctrl+C 结束。
+
+POLL_INTERVAL = 0.5
+DEBOUNCE = 1.0
+
+
+# 被监视的各个文件的 (修改时间, 大小)
+def scan(docs_folder, images_folder):
+    paths = glob.glob(os.path.join(docs_folder, "*.txt"))
+    paths += glob.glob(os.path.join(CITY_STOP_DIR, "*.txt"))
+    paths += [p for p in glob.glob(os.path.join(images_folder, "*"))
+              if p.lower().endswith(".png")]
+    paths.append(STOP_FILE)
+    state = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        state[path] = (st.st_mtime_ns, st.st_size)
+    return state
+
+
+# 单个城市出错时只打印错误，不中断监视
+def report_error(name, error):
+    print(f"  处理 {name} 时出错: {type(error).__name__}: {error}")
+
+
+# 新增、删除或修改过的文件
+def changed_paths(old, new):
+    return {path for path in old.keys() | new.keys() if old.get(path) != new.get(path)}
+
+
+# 等待下一批变化（连续 debounce 秒没有新变化后返回），返回 (变化的文件, 最新状态)
+def wait_for_changes(state, scan_state, interval=POLL_INTERVAL, debounce=DEBOUNCE):
+    while True:
+        time.sleep(interval)
+        current = scan_state()
+        if current == state:
+            continue
+        quiet_since = time.monotonic()
+        while time.monotonic() - quiet_since < debounce:
+            time.sleep(interval)
+            latest = scan_state()
+            if latest != current:
+                current = latest
+                quiet_since = time.monotonic()
+        return changed_paths(state, current), current
+
+
+class WatchSession:
+    """内存中保存各城市的词频，按变化的文件只重新计算受影响的城市"""
+
+    def __init__(self, args):
+        self.args = args
+        self.cache = SegmentCache()
+        self.tracker = IncrementalCounter()
+        self.counts = {}
+        self.load_filters()
+        self.assets = AssetIndex(args.images)
+
+    def load_filters(self):
+        self.plain = TokenFilter()
+        self.weighted = TokenFilter(weighted=True)
+
+    def texts(self):
+        return sorted(glob.glob(os.path.join(self.args.docs, "*.txt")))
+
+    # 重新统计这些文件的词频（已删除的文件从内存中移除）
+    def recount(self, paths):
+        existing = [p for p in paths if os.path.isfile(p)]
+        for path in set(paths) - set(existing):
+            self.counts.pop(path, None)
+            print(f"已移除: {os.path.basename(path)}")
+        try:
+            raw = count_files(existing, workers=self.args.jobs, cache=self.cache,
+                              incremental=self.tracker)
+        except Exception:
+            # 有文件出错时逐个重新统计，跳过出错的文件（内存中保留它上次的词频）
+            raw = {}
+            for path in existing:
+                try:
+                    raw.update(count_files([path], cache=self.cache, incremental=self.tracker))
+                except Exception as e:
+                    report_error(os.path.basename(path), e)
+        for path in raw:
+            self.counts[path] = DocCounts.from_counts(raw[path])
+        return [p for p in existing if p in raw]
+
+    # 生成这些文件对应城市的词频总表和词云图
+    def render(self, paths):
+        args = self.args
+        os.makedirs(args.output, exist_ok=True)
+        jobs = []
+        for path in paths:
+            doc = self.counts.get(path)
+            if doc is None:
+                continue
+            district_name = extract_district_name(os.path.basename(path))
+            print(f"正在处理: {district_name}")
+            try:
+                job = self.city_job(doc, path, district_name)
+            except Exception as e:
+                report_error(district_name, e)
+                continue
+            if job is not None:
+                jobs.append(job)
+        if not jobs:
+            return
+        try:
+            render_clouds(jobs, args.jobs)
+        except Exception:
+            # 有词云图出错时逐个重新生成，跳过出错的城市
+            for job in jobs:
+                try:
+                    render_clouds([job])
+                except Exception as e:
+                    report_error(os.path.basename(job['output_file']), e)
+
+    # 生成一个城市的词频总表，返回它的词云图任务；没有保留的词时返回 None
+    def city_job(self, doc, path, district_name):
+        args = self.args
+        _, top50, total = rank_doc(doc, self.plain.for_city(district_name), 50)
+        if not total:
+            print("  没有保留的词，跳过")
+            return None
+        if not args.preview:
+            top50_data = [(w, f, f"{f/total*100:.2f}%") for w, f in top50]
+            for output_file in write_frequency_table(district_name, top50_data, args.output,
+                                                     args.tables.split(",")):
+                print(f"  已保存完整词频表: {output_file}")
+        png_file = self.assets.find(os.path.basename(path))
+        style = DISTRICT_STYLE if png_file is not None else PLAIN_STYLE
+        token_filter = (self.weighted if png_file is not None else self.plain)
+        words, _, _ = rank_doc(doc, token_filter.for_city(district_name), 0)
+        job = dict(style, words=cloud_words(words, style['options']['max_words']),
+                   output_file=os.path.join(args.output, f"{district_name}_词云图.png"),
+                   layout_cache=LAYOUT_DIR, relayout=args.relayout)
+        if png_file is not None:
+            job['mask'] = png_file
+        return preview_job(job, args.preview) if args.preview else job
+
+    # 按变化的文件决定要重新计算的城市，返回处理的城市数
+    def update(self, changed):
+        texts = self.texts()
+        docs = os.path.normpath(self.args.docs)
+        text_changes = [p for p in changed if os.path.dirname(os.path.normpath(p)) == docs]
+        affected = set(self.recount(text_changes)) if text_changes else set()
+
+        city_changes = {os.path.splitext(os.path.basename(p))[0] for p in changed
+                        if os.path.dirname(os.path.normpath(p)) == os.path.normpath(CITY_STOP_DIR)}
+        if STOP_FILE in changed:
+            print("停用词已变化，重新过滤所有城市（不重新分词）")
+            self.load_filters()
+            affected.update(texts)
+        elif city_changes:
+            print(f"城市停用词已变化: {', '.join(sorted(city_changes))}")
+            self.load_filters()
+            affected.update(p for p in texts
+                            if extract_district_name(os.path.basename(p)) in city_changes)
+
+        images = os.path.normpath(self.args.images)
+        image_changes = {p for p in changed if os.path.dirname(os.path.normpath(p)) == images}
+        if image_changes:
+            old_assets = self.assets
+            self.assets = AssetIndex(self.args.images)
+            for path in texts:
+                name = os.path.basename(path)
+                before, after = old_assets.find(name), self.assets.find(name)
+                if before != after or after in image_changes:
+                    affected.add(path)
+
+        ordered = [p for p in texts if p in affected]
+        self.render(ordered)
+        return len(ordered)
+
+    def run(self):
+        scan_state = functools.partial(scan, self.args.docs, self.args.images)
+        state = scan_state()
+        texts = self.texts()
+        if not texts:
+            print(f"警告: 在 '{self.args.docs}' 中没有找到文本文件")
+        self.recount(texts)
+        self.render(texts)
+        lazyload.report()
+        print(f"正在监视 {self.args.docs}、{STOP_FILE}、{CITY_STOP_DIR}、{self.args.images}（Ctrl+C 结束）")
+        try:
+            while True:
+                changed, state = wait_for_changes(state, scan_state, debounce=self.args.debounce)
+                start = time.perf_counter()
+                try:
+                    done = self.update(changed)
+                except Exception as e:
+                    print(f"更新时出错: {type(e).__name__}: {e}（继续监视）")
+                    continue
+                print(f"更新了 {done} 个城市，用时 {time.perf_counter() - start:.2f}s")
+        except KeyboardInterrupt:
+            print("已停止监视")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="监视语料和停用词，只重新生成受影响的城市")
+    parser.add_argument("--docs", default="xxx", help="语料文件夹（默认 xxx）")
+    parser.add_argument("--images", default="地区抠图", help="背景轮廓图文件夹")
+    parser.add_argument("--output", default="词频与词云图", help="输出文件夹")
+    parser.add_argument("--tables", default="png",
+                        help=f"词频总表输出格式，逗号分隔，可选 {','.join(TABLE_BACKENDS)}（默认 png）")
+    parser.add_argument("--jobs", type=int, default=1, help="分词和渲染的进程数（默认1）")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE,
+                        help=f"最后一次变化后等待多少秒再处理（默认 {DEBOUNCE}）")
+    parser.add_argument("--relayout", action="store_true",
+                        help="词频略有变化时保留词云图中不变的词的位置，只重新放置变化的词")
+    parser.add_argument("--preview", type=float, nargs="?", const=PREVIEW_SCALE,
+                        help=f"只生成低分辨率的词云图预览（缩小比例，默认 {PREVIEW_SCALE}），不生成词频总表")
+    WatchSession(parser.parse_args()).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+from array import array
+
+from wordfilter import WEIGHT_MIN_LEN, NOISE_PATTERN
+import lazyload
+
+# 词频的向量化过滤、加权与 Top-K 选取
+#
+# 词先映射成整个运行共用的整数ID（TokenIndex），每个词的字符串只保存一份，
+# 词长、是否为标点/数字等元数据按ID只计算一次；每个文件的词频保存为
+# ID数组 + 次数数组（DocCounts），内存只与不同词的数量有关，不随文件数成倍增长。
+# 之后每个城市的长度过滤、停用词过滤和 3.5 倍加权都是 NumPy 数组运算，
+# Top-K 用 argpartition 做部分选择，不对整个词表排序。
+# 相同词频的词按首次出现的先后排列，与 sorted(..., reverse=True) 的结果一致。
+
+
+class TokenIndex:
+    """词 → 整数ID 的映射，整个运行共用"""
+
+    def __init__(self):
+        self.ids = {}
+        self.words = []
+        self._lengths = array('i')
+        self._length_array = None
+        self._noise = None
+
+    def __len__(self):
+        return len(self.words)
+
+    # 把一组词转换为ID数组，新词追加到词表末尾
+    def encode(self, words):
+        np = lazyload.load("numpy")
+        ids = self.ids
+        get = ids.get
+        result = array('i')
+        for word in words:
+            wid = get(word)
+            if wid is None:
+                wid = ids[word] = len(self.words)
+                self.words.append(word)
+                self._lengths.append(len(word))
+            result.append(wid)
+        return np.frombuffer(result, dtype=np.int32)
+
+    # 每个ID对应的词长
+    def lengths(self):
+        np = lazyload.load("numpy")
+        if self._length_array is None or len(self._length_array) != len(self._lengths):
+            self._length_array = np.array(self._lengths, dtype=np.int32)
+        return self._length_array
+
+    # 每个ID是否全部由标点、符号、数字或空白组成（新词只判断一次）
+    def noise(self):
+        np = lazyload.load("numpy")
+        done = 0 if self._noise is None else len(self._noise)
+        if done < len(self.words):
+            match = NOISE_PATTERN.fullmatch
+            new = np.fromiter((match(w) is not None for w in self.words[done:]), dtype=bool,
+                              count=len(self.words) - done)
+            self._noise = new if self._noise is None else np.concatenate([self._noise, new])
+        return self._noise
+
+
+# 默认的全局词表
+TOKENS = TokenIndex()
+
+
+class DocCounts:
+    """一个文件（或过滤后）的词频：词ID数组 + 次数数组，保持词的首次出现顺序"""
+
+    __slots__ = ('ids', 'counts', 'index')
+
+    def __init__(self, ids, counts, index=TOKENS):
+        self.ids = ids
+        self.counts = counts
+        self.index = index
+
+    # Counter/字典 → DocCounts（已经是 DocCounts 时原样返回）
+    @classmethod
+    def from_counts(cls, word_counts, index=TOKENS):
+        if isinstance(word_counts, cls) and word_counts.index is index:
+            return word_counts
+        np = lazyload.load("numpy")
+        ids = index.encode(list(word_counts.keys()))
+        counts = np.fromiter(word_counts.values(), dtype=np.int64, count=len(ids))
+        return cls(ids, counts, index)
+
+    def __len__(self):
+        return len(self.ids)
+
+    # 序列化（如传给渲染进程）时转换为普通字典，不带上整个词表
+    def __reduce__(self):
+        return (dict, (self.to_dict(),))
+
+    def total(self):
+        return int(self.counts.sum())
+
+    def keys(self):
+        words = self.index.words
+        return [words[i] for i in self.ids.tolist()]
+
+    def values(self):
+        return self.counts.tolist()
+
+    def items(self):
+        return zip(self.keys(), self.values())
+
+    def to_dict(self):
+        return dict(self.items())
+
+    # 次数最多的 k 个词组成的字典（顺序与对完整字典做稳定排序后取前 k 个相同）
+    def top(self, k):
+        words = self.index.words
+        ids, counts = self.ids, self.counts
+        return {words[ids[i]]: counts[i].item() for i in top_k(counts, k)}
+
+
+# Counter/字典/DocCounts → (ID数组, 词频数组)，保持原有顺序
+def count_arrays(word_counts, index=TOKENS):
+    doc = DocCounts.from_counts(word_counts, index)
+    return doc.ids, doc.counts
+
+
+# 按过滤规则筛选并加权，返回 (ID数组, 权重后的词频数组)
+def filter_arrays(ids, counts, token_filter, index=TOKENS):
+    np = lazyload.load("numpy")
+    mask = token_filter.keep_flags(index)[ids]
+    ids = ids[mask]
+    values = counts[mask]
+    if token_filter.weighted:
+        long_words = index.lengths()[ids] >= WEIGHT_MIN_LEN
+        values = values * np.where(long_words, token_filter.weight, token_filter.short_weight)
+        if token_filter.integer:
+            values = values.astype(np.int64)
+    return ids, values
+
+
+# 取词频最高的 k 个位置（降序；相同词频按原顺序）
+def top_k(values, k):
+    np = lazyload.load("numpy")
+    n = len(values)
+    if n == 0 or k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        # 部分选择出第 k 大的值，所有不小于它的都是候选（包括并列的）
+        kth = np.partition(values, n - k)[n - k]
+        candidates = np.flatnonzero(values >= kth)
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -values[candidates]))
+    return candidates[order[:k]]
+
+
+# 过滤、加权并取 Top-K，返回 (过滤后的 DocCounts, [(词, 词频), ...], 总词频)
+def rank_doc(doc, token_filter, k):
+    ids, values = filter_arrays(doc.ids, doc.counts, token_filter, doc.index)
+    words = doc.index.words
+    top = [(words[ids[i]], int(values[i])) for i in top_k(values, k)]
+    return DocCounts(ids, values, doc.index), top, int(values.sum())
+
+
+# WordCloud 只使用权重最高的 max_words 个词：DocCounts 只取出这些词，字典原样传入
+def cloud_words(words, max_words):
+    return words.top(max_words) if isinstance(words, DocCounts) else words
+
+
+# 过滤、加权并取 Top-K，返回 (过滤后的词频字典, [(词, 词频), ...], 总词频)
+def rank_counts(word_counts, token_filter, k, index=TOKENS):
+    filtered, top, total = rank_doc(DocCounts.from_counts(word_counts, index), token_filter, k)
+    return filtered.to_dict(), top, total
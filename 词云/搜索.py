@@ -1,11 +1,20 @@
 import openpyxl
+from openpyxl.utils import column_index_from_string
 import webbrowser
 from urllib.parse import quote
 import time
+import os
+import argparse
+import fetch
+import searchcache
 
 # 配置
 EXCEL_PATH = "上海、深圳、杭州、北京、苏州.xlsx"  # 替换为你的Excel路径
 SEARCH_DELAY = 1  # 搜索间隔时间
+KEYWORD_COLUMN = "B"  # 关键词所在列
+FIRST_ROW, LAST_ROW = 3, 45  # 关键词所在行范围
+SEARCHED_FILE = "已搜索关键词.txt"  # 浏览器模式已搜索关键词记录，重新运行时跳过
+FETCHED_DIR = "已抓取关键词"  # 无界面模式按输出文件分别记录已抓取完成的关键词
 
 def show_sheet_list(wb):
     """显示所有工作表列表"""
@@ -30,28 +39,153 @@ def get_sheet_range(wb):
         except ValueError:
             print("请输入有效数字！")
 
-def process_excel():
-    """主处理函数"""
-    wb = openpyxl.load_workbook(EXCEL_PATH)
+def normalize_keyword(value):
+    """去掉首尾空白并合并中间的连续空白"""
+    return searchcache.normalize_keyword(value) if value is not None else ""
+
+def read_keywords(sheet, column=KEYWORD_COLUMN, first_row=FIRST_ROW, last_row=LAST_ROW):
+    """按行读取工作表中指定列、指定行范围内的关键词（跳过空单元格）"""
+    col = column_index_from_string(column)
+    keywords = []
+    for (value,) in sheet.iter_rows(min_row=first_row, max_row=last_row,
+                                    min_col=col, max_col=col, values_only=True):
+        keyword = normalize_keyword(value)
+        if keyword:
+            keywords.append(keyword)
+    return keywords
+
+def fetched_record(output_file):
+    """无界面模式下某个输出文件对应的已抓取关键词记录"""
+    return os.path.join(FETCHED_DIR, os.path.basename(output_file))
+
+class SearchedKeywords:
+    """已搜索关键词的持久记录，每行一个，追加写入"""
+
+    def __init__(self, path=SEARCHED_FILE):
+        self.path = path
+        self.keywords = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.keywords = {line.strip() for line in f if line.strip()}
+
+    def __contains__(self, keyword):
+        return keyword in self.keywords
+
+    def add(self, keyword):
+        if keyword in self.keywords:
+            return
+        self.keywords.add(keyword)
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(keyword + "\n")
+
+    def clear(self):
+        self.keywords.clear()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def process_excel(headless=False, search_url=fetch.SEARCH_URL,
+                  concurrency=fetch.CONCURRENCY, rate=fetch.RATE_LIMIT, resume=True,
+                  use_cache=True, cache_ttl=searchcache.CACHE_TTL,
+                  excel_path=EXCEL_PATH, sheet_range=None):
+    """主处理函数
+
+    headless=True 时不打开浏览器，直接并发抓取搜索结果页并把正文写入
+    xxx/<工作表名>.txt
+    关键词在各工作表之间去重。浏览器模式打开搜索页后把关键词记录在 SEARCHED_FILE 中；
+    无界面模式在正文写入后才记录，按输出文件分别记录在 FETCHED_DIR/<工作表名>.txt 中，
+    两种模式互不影响。重新运行时跳过记录中的关键词（并打印跳过的个数），
+    resume=False 时清空记录重新搜索全部关键词。
+    无界面模式下结果页缓存在 searchcache.CACHE_DIR 中，cache_ttl 秒内不重复请求。
+    sheet_range 为 (起始索引, 结束索引)，为空时交互式选择。
+    返回无界面模式写入的文本文件列表。
+    """
+    # 只读模式按行流式读取，不把整个工作簿载入内存
+    wb = openpyxl.load_workbook(excel_path, read_only=True)
+    browser_record = None if headless else SearchedKeywords()
+    cache = searchcache.ResponseCache(ttl=cache_ttl) if headless and use_cache else None
+    if not resume and browser_record is not None:
+        browser_record.clear()
     
     # 获取用户选择范围
-    start_idx, end_idx = get_sheet_range(wb)
+    start_idx, end_idx = sheet_range if sheet_range is not None else get_sheet_range(wb)
     
     # 处理选定范围的工作表
-    for sheet in wb.worksheets[start_idx:end_idx+1]:
-        print(f"\n正在处理工作表：{sheet.title}（{sheet.parent.index(sheet)+1}/{len(wb.worksheets)}）")
+    seen = set()
+    duplicates = 0
+    resumed = 0
+    outputs = []
+    for index, sheet in enumerate(wb.worksheets[start_idx:end_idx+1], start_idx):
+        print(f"\n正在处理工作表：{sheet.title}（{index+1}/{len(wb.worksheets)}）")
+        output_file = os.path.join(fetch.OUTPUT_DIR, f"{sheet.title}.txt")
+        if headless:
+            searched = SearchedKeywords(fetched_record(output_file))
+            if not resume:
+                searched.clear()
+        else:
+            searched = browser_record
+        
+        # 读取关键词，跳过其他工作表中已出现的和之前已搜索过的
+        keywords = []
+        done_before = 0
+        for keyword in read_keywords(sheet):
+            if keyword in seen:
+                duplicates += 1
+                continue
+            seen.add(keyword)
+            if keyword in searched:
+                done_before += 1
+                continue
+            keywords.append(keyword)
+        if done_before:
+            print(f"跳过之前已{'抓取' if headless else '搜索'}的关键词 {done_before} 个（记录见 {searched.path}）")
+            resumed += done_before
+        if not keywords:
+            print("没有需要搜索的新关键词")
+            continue
         
-        # 遍历B3-B45单元格
-        for row in range(3, 46):
-            cell = sheet[f'B{row}']
-            if cell.value and str(cell.value).strip():
-                keyword = str(cell.value).strip()
-                print(f"正在搜索：{keyword}")
-                
-                # 生成并打开搜索链接
-                search_url = f"https://www.baidu.com/s?wd={quote(keyword)}"
-                webbrowser.open_new_tab(search_url)
-                time.sleep(SEARCH_DELAY)
+        if headless:
+            # 并发抓取并直接写入文本文件（正文写入后才记录为已抓取）
+            outputs.append(output_file)
+            print(f"正在抓取 {len(keywords)} 个关键词，写入 {output_file}")
+            done, failed = fetch.run_fetch(keywords, output_file, search_url=search_url,
+                                           concurrency=concurrency, rate=rate,
+                                           on_done=searched.add, cache=cache)
+            print(f"完成 {done} 个，失败 {failed} 个")
+            continue
+        
+        for keyword in keywords:
+            print(f"正在搜索：{keyword}")
+            
+            # 生成并打开搜索链接
+            url = f"https://www.baidu.com/s?wd={quote(keyword)}"
+            webbrowser.open_new_tab(url)
+            searched.add(keyword)
+            time.sleep(SEARCH_DELAY)
+    
+    wb.close()
+    if duplicates:
+        print(f"\n跳过与其他工作表重复的关键词 {duplicates} 个")
+    if resumed:
+        record = FETCHED_DIR if headless else SEARCHED_FILE
+        print(f"跳过之前已{'抓取' if headless else '搜索'}的关键词 {resumed} 个"
+              f"（记录见 {record}，--all 重新搜索全部）")
+    if cache is not None:
+        print(cache.summary())
+    return outputs
 
 if __name__ == "__main__":
-    process_excel()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="按Excel中的关键词批量搜索")
+    parser.add_argument("--headless", action="store_true", help="不打开浏览器，直接抓取正文写入 xxx/<工作表名>.txt")
+    parser.add_argument("--search-url", default=fetch.SEARCH_URL, help="搜索地址模板，{keyword} 处填入关键词")
+    parser.add_argument("--concurrency", type=int, default=fetch.CONCURRENCY, help="同时进行的请求数")
+    parser.add_argument("--rate", type=float, default=fetch.RATE_LIMIT, help="每秒最多请求数（0 表示不限制）")
+    parser.add_argument("--all", action="store_true", help="清空已搜索/已抓取记录，重新搜索全部关键词")
+    parser.add_argument("--no-cache", action="store_true", help="不使用搜索结果缓存")
+    parser.add_argument("--cache-ttl", type=float, default=searchcache.CACHE_TTL / 86400,
+                        help="搜索结果缓存有效期（天）")
+    args = parser.parse_args()
+    process_excel(headless=args.headless, search_url=args.search_url,
+                  concurrency=args.concurrency, rate=args.rate, resume=not args.all,
+                  use_cache=not args.no_cache, cache_ttl=args.cache_ttl * 86400)
\ No newline at end of file
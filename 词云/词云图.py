@@ -1,37 +1,21 @@
-import jieba
 from wordcloud import WordCloud
 import numpy as np
 from PIL import Image
 from matplotlib import colors
+from wordfilter import TokenFilter
+from segment import count_text
 
 f = open(r'text.txt', "r", encoding="utf-8")
 text = f.read()
 f.close()
-words_list_jieba = jieba.lcut(text)
 
+token_filter = TokenFilter(max_len=4)
+stop = token_filter.stopword_set()
 
-def findifhave(demo, stop):
-    for ret in stop:
-        if (demo == ret):
-            return 'T'
+dict = count_text(text)
 
-
-stop = ['\n']
-with open("stop.txt", 'r', encoding='utf-8') as f1:
-    for line in f1:
-        stop.append(line.replace("\n", ""))
-f1.close()
-
-dict = {}
-for key in words_list_jieba:
-    dict[key] = dict.get(key, 0) + 1
-
-for demo in list(dict.keys()):
-    if ('T' == findifhave(demo, stop)):
-        del dict[demo]
-
-# 过滤掉长度不在2到5个字之间的词
-filtered_dict = {key: value for key, value in dict.items() if 2 <= len(key) <= 4}
+# 过滤停用词和长度不在2到4个字之间的词
+filtered_dict = token_filter.apply(dict)
 
 dict1 = sorted(filtered_dict.items(), key=lambda d: d[1], reverse=True)
 print(dict1)
@@ -1,38 +1,28 @@
-import jieba
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-import matplotlib
 import os
+import argparse
 import re
 from collections import Counter
+from wordfilter import TokenFilter
+from segment import count_file, count_files
+from segcache import SegmentCache
+from incremental import IncrementalCounter
+from wordcount import DocCounts, rank_doc, cloud_words
+from termmatrix import WEIGHTINGS, make_ranker
+from phrases import file_phrases, merge_phrases
+from dedup import dedup_files
+from tables import TABLE_BACKENDS, write_frequency_table
+from render import build_cloud, save_cloud, preview_job, PLAIN_STYLE, PREVIEW_SCALE
+from layout import LAYOUT_DIR
+from profiling import profiler
+import lazyload
 
-# 设置中文字体支持
-matplotlib.rcParams['font.sans-serif'] = ['SimHei']  # 用来正常显示中文标签
-matplotlib.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
+# wordcloud、matplotlib 等重量级模块在生成图片时才导入（见 lazyload）
 
 # 确保输出文件夹存在
 output_dir = '词频与词云图'
 if not os.path.exists(output_dir):
     os.makedirs(output_dir)
 
-# 辅助函数：检查是否为停用词
-def findifhave(demo, stop):
-    for ret in stop:
-        if (demo == ret):
-            return 'T'
-
-# 获取停用词列表
-def load_stopwords(stopwords_file="stop.txt"):
-    stop = ['\n']
-    try:
-        with open(stopwords_file, 'r', encoding='utf-8') as f1:
-            for line in f1:
-                stop.append(line.replace("\n", ""))
-        return stop
-    except FileNotFoundError:
-        print(f"警告: 停用词文件 '{stopwords_file}' 未找到，使用默认停用词列表")
-        return stop
-
 # 从文件名中提取区域名称
 def extract_district_name(filename):
     # 尝试匹配"XX区"或"XX新区"格式
@@ -42,65 +32,47 @@ def extract_district_name(filename):
     return os.path.splitext(filename)[0].strip()  # 如果没有匹配到，返回无扩展名的文件名
 
 # 处理文本并获取词频
-def process_text(text_file, input_folder, stop_words):
+# word_dict 为已统计好的原始词频（并行模式下预先算好），为空时在此处分词
+# stream=True 时按段落流式分词，内存占用不随文件大小增长
+# ranker 为 termmatrix.make_ranker 的结果时按跨城市的区分度排序和加权，为空时按词频
+def process_text(text_file, input_folder, token_filter, word_dict=None, stream=False, ranker=None):
     district_name = extract_district_name(text_file)
     
     print(f"正在处理: {district_name}")
     
-    # 读取文本文件
-    with open(os.path.join(input_folder, text_file), "r", encoding="utf-8") as f:
-        text = f.read()
-    
-    # 分词
-    words_list_jieba = jieba.lcut(text)
-    
-    # 构建词频字典
-    word_dict = {}
-    for key in words_list_jieba:
-        word_dict[key] = word_dict.get(key, 0) + 1
+    # 读取文本文件，分词并构建词频字典
+    if word_dict is None:
+        with profiler.stage("分词", district_name):
+            word_dict = DocCounts.from_counts(count_file(os.path.join(input_folder, text_file), stream))
     
-    # 过滤停用词
-    for demo in list(word_dict.keys()):
-        if ('T' == findifhave(demo, stop_words)):
-            del word_dict[demo]
+    # 过滤停用词，仅保留2-5字词汇（不调整权重），同时得到Top50和总词频
+    with profiler.stage("过滤排序", district_name):
+        if ranker is not None:
+            filtered_dict, top50, total = ranker(os.path.join(input_folder, text_file),
+                                                 token_filter.for_city(district_name), 50)
+        else:
+            filtered_dict, top50, total = rank_doc(DocCounts.from_counts(word_dict),
+                                                   token_filter.for_city(district_name), 50)
     
-    # 仅保留2-5字词汇（不调整权重）
-    filtered_dict = {k: v for k, v in word_dict.items() if 2 <= len(k) <= 5}
-    
-    # 计算总词频
-    total = sum(filtered_dict.values())
-    
-    # 获取Top50高频词并计算占比
-    sorted_words = sorted(filtered_dict.items(), key=lambda x: x[1], reverse=True)
-    top50_words = [(word, freq, f"{freq/total*100:.2f}%") for word, freq in sorted_words[:50]]
+    # 计算Top50高频词的占比
+    top50_words = [(word, freq, f"{freq/total*100:.2f}%") for word, freq in top50]
     
     return district_name, filtered_dict, top50_words, total
 
-# 生成词云图
-def generate_wordcloud(word_dict, title):
-    # 生成词云
-    wordcloud = WordCloud(
-        font_path='simhei.ttf',
-        width=800,
-        height=600,
-        background_color='black',  # 修改为黑色背景
-        max_words=100,
-        max_font_size=300,
-        prefer_horizontal=0.9,
-        color_func=lambda *args, **kwargs: "white",  # 设置文字为白色
-        collocations=False
-    ).fit_words(word_dict)
-    
-    # 创建图形并显示词云
-    plt.figure(figsize=(10, 8))
-    plt.imshow(wordcloud, interpolation="bilinear")
-    plt.axis("off")
-    # 移除标题行
-    
-    # 保存词云图
-    output_file = os.path.join(output_dir, f"{title}_词云图.png")
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
-    plt.close()
+# 生成词云图（黑色背景、白色文字，见 render.PLAIN_STYLE）
+# layout_cache 为布局缓存文件夹（为空时每次重新布局），relayout=True 时词频略有变化也复用布局
+# preview 为缩小比例时只生成低分辨率预览（见 render.preview_job）
+def generate_wordcloud(word_dict, title, layout_cache=None, relayout=False, preview=None):
+    words = cloud_words(word_dict, PLAIN_STYLE['options']['max_words'])
+    job = dict(PLAIN_STYLE, words=words, output_file=os.path.join(output_dir, f"{title}_词云图.png"),
+               layout_cache=layout_cache, relayout=relayout)
+    if preview:
+        job = preview_job(job, preview)
+        os.makedirs(os.path.dirname(job['output_file']), exist_ok=True)
+    with profiler.stage("词云布局", title):
+        wordcloud = build_cloud(job)
+    with profiler.stage("保存词云图", title):
+        output_file = save_cloud(wordcloud, job)
     
     print(f"  已保存词云图: {output_file}")
     return output_file
@@ -138,62 +110,37 @@ def generate_wordcloud(word_dict, title):
 #     print(f"  已保存词频表: {output_file}")
 #     return output_file
 
-# 创建完整词频表格
-def create_full_frequency_table(district_name, top50_data):
-    # 创建表格数据
-    table_data = []
-    for i in range(25):  # 两列各25行
-        row = [
-            i+1,
-            top50_data[i][0],
-            f"{top50_data[i][1]:,}".replace(",", " "),
-            top50_data[i][2],
-            i+26,
-            top50_data[i+25][0],
-            f"{top50_data[i+25][1]:,}".replace(",", " "),
-            top50_data[i+25][2]
-        ]
-        table_data.append(row)
-
-    # 创建图表
-    fig, ax = plt.subplots(figsize=(16, 12))
-    ax.axis('off')
-    
-    # 创建表格
-    table = ax.table(
-        cellText=table_data,
-        colLabels=["序号", "主题词", "词频 / 次", "占比", "序号", "主题词", "词频 / 次", "占比"],
-        colColours=['#f0f0f0']*8,
-        cellLoc='center',
-        loc='center'
-    )
-    
-    # 设置表格样式
-    table.auto_set_font_size(False)
-    table.set_fontsize(10)
-    table.scale(1, 2)  # 调整表格尺寸
-    
-    # 设置标题
-    plt.title(f"{district_name} xxx词频排名前50位", 
-             fontsize=14, y=0.95, pad=20)
-    
-    # 保存图片
-    output_file = os.path.join(output_dir, f"{district_name}_词频总表.png")
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    print(f"  已保存完整词频表: {output_file}")
-    return output_file
+# 创建完整词频表格，formats 为输出格式（见 tables.TABLE_BACKENDS）
+def create_full_frequency_table(district_name, top50_data, formats=('png',)):
+    with profiler.stage("词频总表", district_name):
+        outputs = write_frequency_table(district_name, top50_data, output_dir, formats)
+    for output_file in outputs:
+        print(f"  已保存完整词频表: {output_file}")
+    return outputs
 
-# 主函数
-def main():
+# 主函数，workers > 1 时使用多进程并行分词，stream=True 时流式分词
+# use_cache=True 时复用分词缓存中未变化文件的词频，以及词频没有变化的词云图布局
+# incremental=True 时只对 xxx/ 中文件末尾新粘贴的内容分词
+# table_formats 为词频总表的输出格式
+# profile 为性能报告路径（为空时不统计），cprofile=True 时同时保存最耗时阶段的 cProfile 数据
+# weighting 为 freq（词频）、tfidf 或 logodds（跨城市区分度，见 termmatrix）
+# phrases=True 时挖掘多词短语（见 phrases）并入词云图的词频
+# relayout=True 时词频略有变化的词云图在上次布局的基础上增量重排（见 layout）
+# preview 为缩小比例时只生成词云图的低分辨率预览，不生成词频总表（用于调整停用词和权重）
+# dedup 为 'exact' 或 'near' 时先删除重复的段落，再统计去重后的语料（见 dedup）
+def main(workers=1, stream=False, use_cache=True, incremental=False, table_formats=('png',),
+         profile=None, cprofile=False, weighting='freq', phrases=False, relayout=False,
+         preview=None, dedup=None):
+    if profile:
+        profiler.enable(cprofile)
+    
     # 设置文档文件夹路径
     docs_folder = "xxx"  # 修改为实际的文档文件夹路径
     
     print("开始生成词频统计与词云图...")
     
-    # 加载停用词
-    stop_words = load_stopwords()
+    # 加载停用词与过滤规则
+    token_filter = TokenFilter()
     
     # 获取所有文本文件
     if not os.path.exists(docs_folder):
@@ -208,22 +155,105 @@ def main():
         print(f"错误: 在 '{docs_folder}' 中没有找到文本文件")
         return
     
+    # 先统计所有文件的原始词频（命中缓存的文件跳过分词，workers > 1 时并行分词）
+    if workers > 1:
+        print(f"使用 {workers} 个进程并行分词...")
+    cache = SegmentCache() if use_cache else None
+    paths = [os.path.join(docs_folder, f) for f in text_files]
+    # 去重后的语料（原文件 → 实际统计的文件）
+    sources = {path: path for path in paths}
+    if dedup:
+        with profiler.stage("去重"):
+            sources = dedup_files(paths, near=(dedup == 'near'))
+    tracker = IncrementalCounter() if incremental else None
+    if profiler.enabled and workers <= 1:
+        # 逐个文件分词，分别记录各城市的分词耗时（结果与一次统计全部文件相同）
+        raw_counts = {}
+        for path in paths:
+            with profiler.stage("分词", extract_district_name(os.path.basename(path))):
+                raw_counts[path] = count_files([sources[path]], stream=stream, cache=cache,
+                                               incremental=tracker)[sources[path]]
+    else:
+        with profiler.stage("分词"):
+            counted = count_files(list(sources.values()), workers=workers, stream=stream,
+                                  cache=cache, incremental=tracker)
+            raw_counts = {path: counted[sources[path]] for path in paths}
+    if cache is not None:
+        print(f"分词缓存: 命中 {cache.hits} 个文件，重新分词 {cache.misses} 个文件")
+    if tracker is not None:
+        print(f"增量统计: 追加处理 {tracker.appended} 个文件，全量统计 {tracker.recounted} 个文件")
+    
+    # 词频转换为全局词表中的ID数组，释放按词的字典（内存只与不同词的数量有关）
+    for path in raw_counts:
+        raw_counts[path] = DocCounts.from_counts(raw_counts[path])
+    
+    # 按区分度排序时，先用全部文件建立词-文档矩阵
+    ranker = None
+    if weighting != 'freq':
+        with profiler.stage("区分度"):
+            ranker = make_ranker(raw_counts, weighting, token_filter=token_filter)
+    
+    # 短语的次数与词频可比，区分度分数不行，只在按词频时并入
+    if phrases and weighting != 'freq':
+        print("提示: --phrases 只在 --weighting freq 时生效，已忽略")
+        phrases = False
+    
     # 处理每个文本文件
     for text_file in text_files:
         # 修改返回值接收
-        district_name, word_dict, top50_words, total = process_text(text_file, docs_folder, stop_words)
+        counts = raw_counts.get(os.path.join(docs_folder, text_file))
+        district_name, word_dict, top50_words, total = process_text(text_file, docs_folder, token_filter, counts, stream, ranker)
+        
+        # 生成完整词频表（预览时只打印前10个词）
+        if preview:
+            print("  " + "，".join(f"{word} {freq}" for word, freq, _ in top50_words[:10]))
+        else:
+            create_full_frequency_table(district_name, top50_words, table_formats)
         
-        # 生成完整词频表
-        create_full_frequency_table(district_name, top50_words)
+        # 把短语并入词云图的词频（并集的前 max_words 个词只可能来自单词的前 max_words 个和短语）
+        if phrases:
+            city_filter = token_filter.for_city(district_name)
+            with profiler.stage("短语", district_name):
+                found = file_phrases(sources[os.path.join(docs_folder, text_file)], city_filter, cache)
+            print(f"  发现 {len(found)} 个短语")
+            word_dict = merge_phrases(cloud_words(word_dict, PLAIN_STYLE['options']['max_words']),
+                                      found, city_filter)
         
         # 生成词云图
-        generate_wordcloud(word_dict, district_name)
+        generate_wordcloud(word_dict, district_name, LAYOUT_DIR if use_cache else None, relayout,
+                           preview)
         
         # # 生成词频表格 (使用Top10)
         # create_word_frequency_table(district_name, top50_words[:10])
     
     print("所有词频统计与词云图生成完毕！")
+    lazyload.report()
+    profiler.finish(profile)
 
 # 执行主函数
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="生成词频统计与词云图")
+    parser.add_argument("--workers", type=int, default=1, help="并行分词的进程数（默认1，即串行）")
+    parser.add_argument("--stream", action="store_true", help="按段落流式分词，适合超大语料")
+    parser.add_argument("--no-cache", action="store_true", help="不使用分词缓存和布局缓存，全部重新计算")
+    parser.add_argument("--incremental", action="store_true", help="只对文件末尾新追加的内容分词")
+    parser.add_argument("--tables", default="png",
+                        help=f"词频总表输出格式，逗号分隔，可选 {','.join(TABLE_BACKENDS)}（默认 png）")
+    parser.add_argument("--profile", nargs="?", const=os.path.join("性能报告", "词频与词云图.json"),
+                        help="记录各阶段、各城市的耗时和内存，写出报告（默认 性能报告/词频与词云图.json）")
+    parser.add_argument("--cprofile", action="store_true", help="配合 --profile，保存最耗时阶段的 cProfile 数据")
+    parser.add_argument("--weighting", choices=WEIGHTINGS, default="freq",
+                        help="排序与词云权重：freq 词频（默认），tfidf / logodds 跨城市区分度")
+    parser.add_argument("--phrases", action="store_true",
+                        help="挖掘多词短语（如\"高质量发展\"）并入词云图，不影响词频总表")
+    parser.add_argument("--relayout", action="store_true",
+                        help="词频略有变化时保留词云图中不变的词的位置，只重新放置变化的词")
+    parser.add_argument("--preview", type=float, nargs="?", const=PREVIEW_SCALE,
+                        help=f"只生成低分辨率的词云图预览（缩小比例，默认 {PREVIEW_SCALE}），不生成词频总表")
+    parser.add_argument("--dedup", choices=("exact", "near"), nargs="?", const="near",
+                        help="统计前删除重复的段落：exact 只删完全重复，near 同时删近似重复（默认）")
+    args = parser.parse_args()
+    main(workers=args.workers, stream=args.stream, use_cache=not args.no_cache,
+         incremental=args.incremental, table_formats=args.tables.split(","),
+         profile=args.profile, cprofile=args.cprofile, weighting=args.weighting,
+         phrases=args.phrases, relayout=args.relayout, preview=args.preview, dedup=args.dedup)
\ No newline at end of file